@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+
+from app.config import IMPORT_BATCH_SIZE, EXPORT_BATCH_SIZE
+from app.database import models
+from app.database.migrations import upgrade_schema
+from app.database.session import session_local, engine
+from app.utils.session_import import import_sessions_file, detect_format, IMPORT_FORMATS
+from app.utils.data_export import export_stream, EXPORT_KINDS, EXPORT_FORMATS
+
+
+def import_sessions_command(args: argparse.Namespace) -> int:
+    """
+    Импортирует сеансы из файла и печатает отчёт в JSON.
+    Возвращает код выхода 1, если хотя бы одна строка не импортирована.
+    """
+    file_format = args.format or detect_format(args.path)
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = session_local()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_sessions_file(db, stream, file_format, args.batch_size)
+    finally:
+        db.close()
+
+    json.dump(report.as_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report.failed else 0
+
+
+def export_command(args: argparse.Namespace) -> int:
+    """
+    Выгружает сеансы или брони в CSV / NDJSON (по желанию в gzip) в файл или stdout.
+    Данные пишутся по мере чтения из базы, память не зависит от размера таблиц.
+    """
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    chunks = export_stream(args.kind, args.format, args.gzip, args.batch_size)
+    if args.output in (None, "-"):
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создаёт парсер аргументов командной строки CinemaFlow."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="CinemaFlow command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-sessions", help="Bulk import sessions from CSV or JSON")
+    import_parser.add_argument("path", help="Path to .csv, .json or .ndjson file")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS, help="File format (detected by extension)")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows per transaction")
+    import_parser.set_defaults(handler=import_sessions_command)
+
+    export_parser = commands.add_parser("export", help="Export sessions or bookings as CSV or NDJSON")
+    export_parser.add_argument("kind", choices=EXPORT_KINDS, help="What to export")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Output format")
+    export_parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    export_parser.add_argument("-o", "--output", help="Output file (stdout by default)")
+    export_parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched per batch")
+    export_parser.set_defaults(handler=export_command)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,3 +9,100 @@ SECRET_KEY_ADMIN = os.getenv("SECRET_KEY_ADMIN")
 SECRET_KEY_USER = os.getenv("SECRET_KEY_USER")
 ALGORITHM = os.getenv("ALGORITHM")
 TOKEN_EXPIRE_MINUTES = int(os.getenv("TOKEN_EXPIRE_MINUTES"))
+
+# База данных: URL можно заменить на Postgres, асинхронный URL по умолчанию выводится из него
+SQL_DB_URL = os.getenv("SQL_DB_URL", "sqlite:///./database.db")
+ASYNC_SQL_DB_URL = os.getenv("ASYNC_SQL_DB_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Пул потоков для Argon2: лимит параллельных хешей и длина очереди (0 — без ограничения)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 100))
+
+# Кэш проверенных JWT: максимальный размер и время жизни записи в секундах
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+
+# Размер страницы списков сеансов (keyset-пагинация)
+SESSIONS_PAGE_SIZE = int(os.getenv("SESSIONS_PAGE_SIZE", 30))
+SESSIONS_PAGE_SIZE_MAX = int(os.getenv("SESSIONS_PAGE_SIZE_MAX", 100))
+
+# Массовый импорт сеансов: размер пачки (одна транзакция на пачку) и лимит сохраняемых ошибок
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+# Максимальная длительность нового сеанса в минутах (форма, импорт, проверка свободного времени).
+# Проверка пересечений от неё не зависит: она смотрит назад на длину самого длинного сеанса зала
+SESSION_MAX_DURATION = int(os.getenv("SESSION_MAX_DURATION", 600))
+
+# Профиль производительности SQLite: прагмы применяются к каждому новому соединению
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") == "1"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+# Все записи идут через одно соединение-писатель, чтения — через общий пул
+SQLITE_SINGLE_WRITER = os.getenv("SQLITE_SINGLE_WRITER", "1") == "1"
+
+# Схема зала: мест в ряду по умолчанию, время удержания места и период очистки просроченных удержаний
+DEFAULT_SEATS_PER_ROW = int(os.getenv("DEFAULT_SEATS_PER_ROW", 10))
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 300))
+SEAT_SWEEP_INTERVAL = int(os.getenv("SEAT_SWEEP_INTERVAL", 15))
+
+# Живая доступность мест (SSE): длина очереди событий подписчика и период keepalive в секундах
+SEAT_EVENTS_QUEUE_SIZE = int(os.getenv("SEAT_EVENTS_QUEUE_SIZE", 32))
+SEAT_EVENTS_HEARTBEAT = int(os.getenv("SEAT_EVENTS_HEARTBEAT", 15))
+
+# Очередь на бронирование горячих сеансов: включение, скорость допуска (запросов в секунду на сеанс),
+# запас токенов, лимит одновременных бронирований в процессе, время жизни допуска по билету
+# и период автообновления страницы ожидания в секундах
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", 5))
+ADMISSION_BURST = int(os.getenv("ADMISSION_BURST", 20))
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", 16))
+ADMISSION_TICKET_TTL = int(os.getenv("ADMISSION_TICKET_TTL", 60))
+ADMISSION_REFRESH = int(os.getenv("ADMISSION_REFRESH", 3))
+
+# Шаблоны: каталог, проверка изменений файлов при каждом рендере (для разработки),
+# байткод-кэш между перезапусками (каталог по умолчанию — системный temp) и размер кэша фрагментов
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", "templates")
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "0") == "1"
+TEMPLATES_BYTECODE_CACHE = os.getenv("TEMPLATES_BYTECODE_CACHE", "1") == "1"
+TEMPLATES_CACHE_DIR = os.getenv("TEMPLATES_CACHE_DIR") or None
+TEMPLATE_FRAGMENT_CACHE_SIZE = int(os.getenv("TEMPLATE_FRAGMENT_CACHE_SIZE", 256))
+
+# Потоковая отдача больших JSON-ответов: сколько элементов сериализуется за одну пачку
+JSON_STREAM_CHUNK_SIZE = int(os.getenv("JSON_STREAM_CHUNK_SIZE", 1000))
+
+# Выгрузка сеансов и броней: строк на пачку чтения/записи и уровень сжатия gzip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", 6))
+
+# Метрики Prometheus (/metrics): включение и необязательный токен для доступа (Authorization: Bearer)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+# Логи: уровень, формат (text — цветной текст, json — по объекту на строку), длина очереди
+# фоновой записи и лимит сообщений в секунду (0 — без ограничения; ошибки не ограничиваются)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", 0))
+
+# Журнал медленных запросов: включение, порог в миллисекундах, размер таблицы самых медленных
+# запросов в админке и запись плана выполнения (EXPLAIN QUERY PLAN) для медленных запросов
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "0") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+SLOW_QUERY_TOP_N = int(os.getenv("SLOW_QUERY_TOP_N", 20))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+
+# Несколько воркеров: количество процессов uvicorn и согласование кэшей между ними
+# (по умолчанию включено: число процессов при запуске через gunicorn отсюда не видно)
+# и период опроса изменений в секундах
+WORKERS = int(os.getenv("WORKERS", 1))
+COHERENCE_ENABLED = os.getenv("COHERENCE_ENABLED", "1") == "1"
+COHERENCE_INTERVAL = float(os.getenv("COHERENCE_INTERVAL", 1))
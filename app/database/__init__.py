@@ -1,3 +1,4 @@
 from app.database import session
 from app.database import models
 from app.database import cruds
+from app.database import schedule_cache
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import COHERENCE_INTERVAL
+from app.database.models import CacheVersion, MovieSession
+from app.database.seat_events import seat_events, snapshot_event, SESSION_DELETED_EVENT
+from app.database.session import engine, is_sqlite
+from app.logger import logger
+
+
+def bump_version(db: Session, name: str) -> int:
+    """
+    Увеличивает версию канала (schedule) в текущей транзакции и возвращает новую версию.
+    Вызывается CRUD перед коммитом: версия меняется атомарно вместе с данными,
+    и другие процессы узнают об изменении при следующем опросе. Новую версию CRUD
+    передаёт кэшу процесса, чтобы опрос не сбрасывал кэш из-за его собственной записи.
+    """
+    db.execute(
+        update(CacheVersion).where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1, updated_at=datetime.now())
+    )
+    return db.scalar(select(CacheVersion.version).where(CacheVersion.name == name))
+
+
+class CoherenceWatcher:
+    """
+    Межпроцессная согласованность кэшей без внешних сервисов.
+    Каждый воркер раз в interval секунд проверяет PRAGMA data_version на собственном соединении:
+    номер меняется, только когда в базу закоммитило другое соединение, поэтому пока данных
+    никто не менял, опрос не читает ни одной таблицы. Когда номер изменился, читаются версии
+    каналов из cache_versions (для изменившихся вызываются обработчики — сброс кэшей)
+    и seat_version сеансов, на которые подписаны страницы этого воркера:
+    для изменившихся подписчикам рассылается свежий снимок мест, для удалённых — событие deleted.
+    Для других СУБД (без data_version) таблица версий читается при каждом опросе.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.handlers: dict[str, list] = {}
+        self.connection = None
+        self.data_version = None
+        self.versions: dict[str, int] | None = None
+        self.seat_versions: dict[int, int] = {}
+        self.lock = threading.Lock()
+        self.polls = 0
+        self.reads = 0
+        self.changes = 0
+
+    def on_change(self, name: str, handler) -> None:
+        """
+        Регистрирует обработчик изменения канала, вызываемый с новой версией канала.
+        Опрос видит и записи этого процесса: обработчик сравнивает версию с уже учтённой.
+        """
+        self.handlers.setdefault(name, []).append(handler)
+
+    def poll(self) -> tuple[dict[str, int], dict[int, dict]]:
+        """
+        Один опрос (синхронный, выполняется в потоке).
+        Возвращает новые версии изменившихся каналов и события-снимки для сеансов с изменёнными местами.
+        """
+        with self.lock:
+            self.polls += 1
+            if self.connection is None:
+                self.connection = engine.connect()
+            connection = self.connection
+            try:
+                if is_sqlite:
+                    data_version = connection.exec_driver_sql("PRAGMA data_version").scalar()
+                    if data_version == self.data_version:
+                        return {}, {}
+                    self.data_version = data_version
+                self.reads += 1
+
+                versions = dict(connection.execute(select(CacheVersion.name, CacheVersion.version)).all())
+                # Первый опрос только запоминает состояние
+                changed = {} if self.versions is None else {
+                    name: version for name, version in versions.items() if self.versions.get(name) != version
+                }
+                self.versions = versions
+
+                events = {}
+                session_ids = seat_events.session_ids()
+                if session_ids:
+                    rows = connection.execute(
+                        select(MovieSession.id, MovieSession.seat_version, MovieSession.seats, MovieSession.seat_map)
+                        .where(MovieSession.id.in_(session_ids))
+                    ).all()
+                    for session_id, seat_version, seats, seat_map in rows:
+                        # Новая подписка тоже получает снимок: её начальное состояние могло устареть
+                        if self.seat_versions.get(session_id) != seat_version:
+                            events[session_id] = snapshot_event(seats, seat_map)
+                        self.seat_versions[session_id] = seat_version
+                    # Сеансов, которых нет в базе, больше нет: их удалил другой воркер
+                    for session_id in set(session_ids) - {row.id for row in rows}:
+                        events[session_id] = SESSION_DELETED_EVENT
+                # Отписанные сеансы больше не отслеживаем
+                self.seat_versions = {
+                    key: version for key, version in self.seat_versions.items() if key in session_ids
+                }
+            finally:
+                # Не держим открытую транзакцию чтения: иначе соединение видело бы старый снимок базы
+                connection.rollback()
+
+        self.changes += len(changed)
+        return changed, events
+
+    def apply(self, changed: dict[str, int], events: dict[int, dict]) -> None:
+        """Вызывает обработчики изменившихся каналов и рассылает снимки мест."""
+        for name, version in changed.items():
+            for handler in self.handlers.get(name, ()):
+                handler(version)
+        for session_id, event in events.items():
+            seat_events.broadcast(session_id, event)
+
+    async def run(self) -> None:
+        """Фоновая задача воркера: опрос раз в interval секунд. Ошибки логируются и не останавливают цикл."""
+        while True:
+            try:
+                changed, events = await asyncio.to_thread(self.poll)
+                self.apply(changed, events)
+            except Exception:
+                logger.exception("Ошибка при проверке изменений из других процессов")
+                # Следующий опрос откроет новое соединение
+                self.close()
+            await asyncio.sleep(self.interval)
+
+    def close(self) -> None:
+        """Возвращает соединение опроса в пул."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def stats(self) -> dict:
+        """Число опросов, чтений таблицы версий и обнаруженных изменений каналов."""
+        return {"polls": self.polls, "reads": self.reads, "changes": self.changes}
+
+
+# Общий экземпляр на процесс (воркер)
+coherence = CoherenceWatcher(COHERENCE_INTERVAL)
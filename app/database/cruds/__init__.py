@@ -1,3 +1,6 @@
 from app.database.cruds import booking_crud
 from app.database.cruds import users_crud
-from app.database.cruds import movies_crud
\ No newline at end of file
+from app.database.cruds import movies_crud
+from app.database.cruds import async_booking_crud
+from app.database.cruds import async_users_crud
+from app.database.cruds import async_movies_crud
@@ -0,0 +1,67 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Type
+
+from app.database.cruds import booking_crud
+from app.database.cruds.booking_crud import BookingRow
+from app.database.models import BookingSession
+
+# Асинхронные варианты функций booking_crud.
+# Запросы выполняются через AsyncSession.run_sync: логика остаётся общей,
+# а ввод-вывод идёт через асинхронный драйвер и не блокирует event loop.
+
+
+async def create_booking(db: AsyncSession, user_id, movie_id: int, seat: int | None = None) -> BookingSession:
+    """
+    Асинхронно создает бронь пользователя на сеанс.
+    Поведение и ошибки совпадают с booking_crud.create_booking.
+    """
+    return await db.run_sync(booking_crud.create_booking, user_id, movie_id, seat)
+
+
+async def hold_seat(db: AsyncSession, user_id: int, movie_id: int, seat: int | None = None) -> BookingSession:
+    """
+    Асинхронно удерживает место за пользователем до подтверждения.
+    """
+    return await db.run_sync(booking_crud.hold_seat, user_id, movie_id, seat)
+
+
+async def confirm_booking(db: AsyncSession, booking_id: int, user_id: int) -> BookingSession:
+    """
+    Асинхронно подтверждает удержание места.
+    """
+    return await db.run_sync(booking_crud.confirm_booking, booking_id, user_id)
+
+
+async def release_expired_holds(db: AsyncSession, limit: int = 500) -> int:
+    """
+    Асинхронно освобождает просроченные удержания мест.
+    """
+    return await db.run_sync(booking_crud.release_expired_holds, limit)
+
+
+async def get_bookings_by_user(db: AsyncSession, user_id: int) -> list[Type[BookingSession]]:
+    """
+    Асинхронно возвращает список всех бронирований пользователя по user_id.
+    """
+    return await db.run_sync(booking_crud.get_bookings_by_user, user_id)
+
+
+async def get_future_bookings_by_user(db: AsyncSession, user_id: int) -> list[BookingRow]:
+    """
+    Асинхронно возвращает будущие бронирования пользователя одним запросом.
+    """
+    return await db.run_sync(booking_crud.get_future_bookings_by_user, user_id)
+
+
+async def get_booking_by_id(db: AsyncSession, booking_id: int) -> BookingSession | None:
+    """
+    Асинхронно получает бронь по её ID.
+    """
+    return await db.run_sync(booking_crud.get_booking_by_id, booking_id)
+
+
+async def delete_booking(db: AsyncSession, booking_id: int) -> BookingSession | None:
+    """
+    Асинхронно удаляет бронь по ID и возвращает её.
+    """
+    return await db.run_sync(booking_crud.delete_booking, booking_id)
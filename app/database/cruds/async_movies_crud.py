@@ -0,0 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Type
+from datetime import datetime
+
+from app.database.cruds import movies_crud
+from app.database.models import MovieSession
+from app.database.cruds.movies_crud import SessionRow, DeletedSession
+from app.utils.schemas import MovieSessionFull, SessionFilters
+
+# Асинхронные варианты функций movies_crud (через AsyncSession.run_sync).
+
+
+async def create_session(db: AsyncSession, session_data: MovieSessionFull) -> MovieSession:
+    """
+    Асинхронно создает новый сеанс фильма в базе данных.
+    """
+    return await db.run_sync(movies_crud.create_session, session_data)
+
+
+async def get_sessions(db: AsyncSession, mode: bool = False) -> list[Type[MovieSession]]:
+    """
+    Асинхронно получает список сеансов из базы.
+    Если mode=True — возвращает только будущие сеансы, отсортированные по дате.
+    """
+    return await db.run_sync(movies_crud.get_sessions, mode)
+
+
+async def get_sessions_page(
+        db: AsyncSession,
+        filters: SessionFilters,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 30,
+        mode: bool = False
+) -> tuple[list[SessionRow], tuple[datetime, int] | None]:
+    """
+    Асинхронно возвращает страницу сеансов и позицию для следующей страницы (keyset-пагинация).
+    """
+    return await db.run_sync(movies_crud.get_sessions_page, filters, after, limit, mode)
+
+
+async def get_session_by_id(db: AsyncSession, session_id: int) -> Type[MovieSession] | None:
+    """
+    Асинхронно получает сеанс по его ID.
+    """
+    return await db.run_sync(movies_crud.get_session_by_id, session_id)
+
+
+async def get_seat_state(db: AsyncSession, session_id: int) -> tuple[int, bytes | None] | None:
+    """
+    Асинхронно возвращает количество свободных мест и схему зала сеанса.
+    """
+    return await db.run_sync(movies_crud.get_seat_state, session_id)
+
+
+async def delete_session(db: AsyncSession, session_id: int) -> DeletedSession | None:
+    """
+    Асинхронно удаляет сеанс из базы по ID вместе с бронями; возвращает затронутых пользователей.
+    """
+    return await db.run_sync(movies_crud.delete_session, session_id)
+
+
+async def find_hall_conflicts(
+        db: AsyncSession,
+        cinema: str,
+        hall: str,
+        start: datetime,
+        duration: int
+) -> list[SessionRow]:
+    """
+    Асинхронно возвращает сеансы того же зала, пересекающиеся с интервалом [start, start + duration).
+    """
+    return await db.run_sync(movies_crud.find_hall_conflicts, cinema, hall, start, duration)
+
+
+async def find_next_free_slot(db: AsyncSession, cinema: str, hall: str, start: datetime, duration: int) -> datetime:
+    """
+    Асинхронно ищет ближайшее время не раньше start, когда зал свободен на duration минут.
+    """
+    return await db.run_sync(movies_crud.find_next_free_slot, cinema, hall, start, duration)
@@ -0,0 +1,22 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Type
+
+from app.database.cruds import users_crud
+from app.database.models import UserSession
+from app.utils.schemas import UserLogin
+
+# Асинхронные варианты функций users_crud (через AsyncSession.run_sync).
+
+
+async def create_user(db: AsyncSession, session_data: UserLogin) -> UserSession:
+    """
+    Асинхронно создает нового пользователя в базе данных.
+    """
+    return await db.run_sync(users_crud.create_user, session_data)
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Type[UserSession] | None:
+    """
+    Асинхронно получает пользователя из базы по username.
+    """
+    return await db.run_sync(users_crud.get_user_by_username, username)
@@ -1,51 +1,354 @@
-from sqlalchemy.orm import Session
-from typing import Type
+from collections import defaultdict
+from dataclasses import dataclass
+from sqlalchemy import update, delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import Type, Iterator
+from datetime import datetime, timedelta
 
-from app.database.models import BookingSession, MovieSession
+from app.config import SEAT_HOLD_TTL
+from app.database.models import BookingSession, MovieSession, UserSession
+from app.database.seat_events import seat_events
+from app.metrics import bookings, booking_failures
+from app.database.seat_map import (
+    SEAT_FREE, SEAT_HELD, SEAT_BOOKED, BOOKING_HELD, BOOKING_CONFIRMED,
+    seat_status, set_seat, set_seats, first_free_seat
+)
 
+# Сколько раз повторять атомарное обновление схемы зала при конкурентном изменении
+MAX_SEAT_RETRIES = 10
 
-def create_booking(db: Session, user_id, movie_id: int) -> BookingSession:
+
+@dataclass(slots=True)
+class BookingRow:
     """
-    Создает новую бронь пользователя на сеанс.
-    Проверяет существование сеанса, наличие свободных мест и отсутствие предыдущей брони.
-    Уменьшает количество доступных мест и сохраняет бронь в базе.
+    Строка брони для профиля: id брони, место, статус и выводимые поля сеанса, без ORM-объектов.
     """
-    # Проверяем, существует ли сеанс
-    session = db.query(MovieSession).filter(MovieSession.id == movie_id).first()
-    if not session:
-        raise ValueError("Session not found")
+    id: int
+    movie: str
+    cinema: str
+    hall: str
+    time: datetime
+    seat: int | None
+    seats_per_row: int
+    status: str
+
+
+def _take_seat(db: Session, movie_id: int, seat: int | None, status: int) -> tuple[int | None, int]:
+    """
+    Атомарно занимает место в схеме зала и уменьшает счётчик свободных мест.
+    Схема обновляется условным UPDATE по seat_version (compare-and-swap):
+    если её успели изменить параллельно, чтение и проверка повторяются.
+    Если seat не указан, берётся первое свободное место.
+    Возвращает номер места и оставшееся количество свободных мест (из RETURNING).
+    Для старых сеансов без схемы зала списывается только счётчик, номер места — None.
+    seat_version увеличивается при любом изменении мест и служит версией сеанса для ETag API.
+    """
+    for _ in range(MAX_SEAT_RETRIES):
+        row = (
+            db.query(MovieSession.seat_map, MovieSession.seat_version)
+            .filter(MovieSession.id == movie_id)
+            .first()
+        )
+        if row is None:
+            raise ValueError("Session not found")
+        seat_map, version = row
+
+        if seat_map is None:
+            seats_left = db.execute(
+                update(MovieSession)
+                .where(MovieSession.id == movie_id, MovieSession.seats > 0)
+                .values(seats=MovieSession.seats - 1, seat_version=MovieSession.seat_version + 1)
+                .returning(MovieSession.seats)
+            ).scalar()
+            if seats_left is None:
+                raise ValueError("Not enough seats available")
+            return None, seats_left
+
+        if seat is None:
+            chosen = first_free_seat(seat_map)
+            if chosen is None:
+                raise ValueError("Not enough seats available")
+        elif not 0 <= seat < len(seat_map):
+            raise ValueError("Seat does not exist")
+        elif seat_status(seat_map, seat) != SEAT_FREE:
+            raise ValueError("Seat is not available")
+        else:
+            chosen = seat
+
+        seats_left = db.execute(
+            update(MovieSession)
+            .where(MovieSession.id == movie_id, MovieSession.seat_version == version, MovieSession.seats > 0)
+            .values(
+                seat_map=set_seat(seat_map, chosen, status),
+                seat_version=version + 1,
+                seats=MovieSession.seats - 1
+            )
+            .returning(MovieSession.seats)
+        ).scalar()
+        if seats_left is not None:
+            return chosen, seats_left
+    raise ValueError("Seat map is busy, try again")
+
+
+def _change_seats(
+        db: Session,
+        movie_id: int,
+        seats: list[int],
+        status: int,
+        expected: int | None,
+        seats_delta: int
+) -> int | None:
+    """
+    Атомарно меняет статус мест в схеме зала (compare-and-swap по seat_version)
+    и сдвигает счётчик свободных мест на seats_delta.
+    Меняются только места со статусом expected (None — любые).
+    Возвращает новое количество свободных мест или None, если сеанса нет.
+    """
+    for _ in range(MAX_SEAT_RETRIES):
+        row = (
+            db.query(MovieSession.seat_map, MovieSession.seat_version)
+            .filter(MovieSession.id == movie_id)
+            .first()
+        )
+        if row is None:
+            return None
+        seat_map, version = row
+
+        if seat_map is None or not seats:
+            return db.execute(
+                update(MovieSession)
+                .where(MovieSession.id == movie_id)
+                .values(seats=MovieSession.seats + seats_delta, seat_version=MovieSession.seat_version + 1)
+                .returning(MovieSession.seats)
+            ).scalar()
+
+        new_map, _ = set_seats(seat_map, seats, status, expected)
+        seats_left = db.execute(
+            update(MovieSession)
+            .where(MovieSession.id == movie_id, MovieSession.seat_version == version)
+            .values(seat_map=new_map, seat_version=version + 1, seats=MovieSession.seats + seats_delta)
+            .returning(MovieSession.seats)
+        ).scalar()
+        if seats_left is not None:
+            return seats_left
+    raise ValueError("Seat map is busy, try again")
+
+
+def _publish(movie_id: int, seats_left: int | None, seats: list[int | None], status: int) -> None:
+    """
+    Публикует изменение мест сеанса подписчикам живой доступности.
+    Вызывается только после коммита, чтобы подписчики не увидели откатившееся изменение.
+    """
+    if seats_left is None:
+        return
+    seat_events.publish(movie_id, seats_left, {seat: status for seat in seats if seat is not None})
+
+
+def _failure_reason(error: ValueError) -> str:
+    """Причина отказа для метрик: текст ошибки в виде метки (not_enough_seats_available)."""
+    return str(error).lower().replace(" ", "_").replace(",", "")
+
+
+def _reserve(
+        db: Session,
+        user_id: int,
+        movie_id: int,
+        seat: int | None,
+        status: str,
+        expires_at: datetime | None
+) -> BookingSession:
+    """
+    Создает бронь и атомарно занимает место в одной транзакции.
+    Повторную бронь отсекает уникальный индекс (user_id, movie_id),
+    двойную продажу места — схема зала и уникальный индекс (movie_id, seat).
+    Успехи и причины отказов считаются в метриках.
+    """
+    try:
+        booking = _insert_booking(db, user_id, movie_id, seat, status, expires_at)
+    except ValueError as e:
+        booking_failures.inc(reason=_failure_reason(e))
+        raise
+    bookings.inc(action=status)
+    return booking
 
-    # Проверяем, бронировал ли уже этот пользователь этот сеанс
-    existing_booking = db.query(BookingSession).filter(
-        BookingSession.user_id == user_id,
-        BookingSession.movie_id == movie_id
-    ).first()
-    if existing_booking:
-        raise ValueError("You have already booked this session")
 
-    # Проверяем доступные места
-    total_booked = len(session.bookings)
-    if total_booked + 1 > session.seats:
-        raise ValueError("Not enough seats available")
+def _is_foreign_key_error(error: IntegrityError) -> bool:
+    """Нарушение внешнего ключа (SQLite: FOREIGN KEY constraint failed, PostgreSQL: foreign key constraint)."""
+    return "foreign key" in str(error.orig).lower()
 
-    # Создаём бронь
+
+def _insert_booking(
+        db: Session,
+        user_id: int,
+        movie_id: int,
+        seat: int | None,
+        status: str,
+        expires_at: datetime | None
+) -> BookingSession:
+    """Вставка брони и занятие места для _reserve."""
+    # Создаём бронь: дубликат упадёт на уникальном ограничении
     booking = BookingSession(
         user_id=user_id,
-        movie_id=movie_id
+        movie_id=movie_id,
+        status=status,
+        expires_at=expires_at
     )
-    session.seats -= 1
-
     db.add(booking)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        # Внешний ключ: сеанса нет (или его удалили); уникальный индекс — повторная бронь
+        if _is_foreign_key_error(e):
+            raise ValueError("Session not found")
+        raise ValueError("You have already booked this session")
+
+    try:
+        seat_state = SEAT_HELD if status == BOOKING_HELD else SEAT_BOOKED
+        booking.seat, seats_left = _take_seat(db, movie_id, seat, seat_state)
+        db.flush()
+    except ValueError:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Seat is not available")
+
     db.commit()
+    _publish(movie_id, seats_left, [booking.seat], seat_state)
+    db.refresh(booking)
+    return booking
+
+
+def create_booking(db: Session, user_id, movie_id: int, seat: int | None = None) -> BookingSession:
+    """
+    Создает подтверждённую бронь пользователя на сеанс сразу, без удержания.
+    Если место не указано, бронируется первое свободное.
+    Место списывается атомарно, поэтому при параллельных запросах мест не продаётся больше, чем есть.
+    """
+    return _reserve(db, user_id, movie_id, seat, BOOKING_CONFIRMED, None)
+
+
+def hold_seat(db: Session, user_id: int, movie_id: int, seat: int | None = None) -> BookingSession:
+    """
+    Временно удерживает место за пользователем на SEAT_HOLD_TTL секунд (первая фаза брони).
+    Если место не указано, удерживается первое свободное.
+    Неподтверждённое удержание освобождает фоновая очистка.
+    """
+    expires_at = datetime.now() + timedelta(seconds=SEAT_HOLD_TTL)
+    return _reserve(db, user_id, movie_id, seat, BOOKING_HELD, expires_at)
+
+
+def confirm_booking(db: Session, booking_id: int, user_id: int) -> BookingSession:
+    """
+    Подтверждает удержание места (вторая фаза брони).
+    Статус брони меняется условным UPDATE: только своя, удерживаемая и не просроченная бронь.
+    Повторное подтверждение уже подтверждённой брони ничего не меняет.
+    """
+    result = db.execute(
+        update(BookingSession)
+        .where(
+            BookingSession.id == booking_id,
+            BookingSession.user_id == user_id,
+            BookingSession.status == BOOKING_HELD,
+            BookingSession.expires_at > datetime.now()
+        )
+        .values(status=BOOKING_CONFIRMED, expires_at=None)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        booking = db.get(BookingSession, booking_id)
+        if booking is None or booking.user_id != user_id:
+            booking_failures.inc(reason="booking_not_found")
+            raise ValueError("Booking not found")
+        if booking.status == BOOKING_CONFIRMED:
+            return booking
+        booking_failures.inc(reason="seat_hold_has_expired")
+        raise ValueError("Seat hold has expired")
+
+    bookings.inc(action=BOOKING_CONFIRMED)
+
+    booking = db.get(BookingSession, booking_id, populate_existing=True)
+    if booking.seat is not None:
+        seats_left = _change_seats(db, booking.movie_id, [booking.seat], SEAT_BOOKED, expected=SEAT_HELD, seats_delta=0)
+        db.commit()
+        _publish(booking.movie_id, seats_left, [booking.seat], SEAT_BOOKED)
+    else:
+        db.commit()
     db.refresh(booking)
     return booking
 
 
+def release_expired_holds(db: Session, limit: int = 500) -> int:
+    """
+    Освобождает просроченные удержания мест: удаляет брони одним DELETE ... RETURNING
+    и возвращает места в схему зала, по одному атомарному обновлению на сеанс.
+    Возвращает количество освобождённых мест.
+    """
+    expired_ids = (
+        select(BookingSession.id)
+        .where(BookingSession.status == BOOKING_HELD, BookingSession.expires_at <= datetime.now())
+        .limit(limit)
+    )
+    released = db.execute(
+        delete(BookingSession)
+        .where(BookingSession.id.in_(expired_ids), BookingSession.status == BOOKING_HELD)
+        .returning(BookingSession.movie_id, BookingSession.seat)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not released:
+        db.rollback()
+        return 0
+
+    seats_by_movie = defaultdict(list)
+    for movie_id, seat in released:
+        seats_by_movie[movie_id].append(seat)
+    seats_left = {}
+    for movie_id, seats in seats_by_movie.items():
+        seats_by_movie[movie_id] = [seat for seat in seats if seat is not None]
+        seats_left[movie_id] = _change_seats(
+            db, movie_id, seats_by_movie[movie_id], SEAT_FREE, expected=SEAT_HELD, seats_delta=len(seats)
+        )
+    db.commit()
+    for movie_id, seats in seats_by_movie.items():
+        _publish(movie_id, seats_left[movie_id], seats, SEAT_FREE)
+    bookings.inc(len(released), action="expired")
+    return len(released)
+
+
 def get_bookings_by_user(db: Session, user_id: int) -> list[Type[BookingSession]]:
     """
     Возвращает список всех бронирований пользователя по user_id.
+    Сеансы подгружаются сразу, чтобы к booking.movie можно было обращаться и вне сессии.
+    Внутреннее соединение пропускает брони без сеанса, оставшиеся в базах до включения внешних ключей.
     """
-    return db.query(BookingSession).filter(BookingSession.user_id == user_id).all()
+    return (
+        db.query(BookingSession)
+        .options(joinedload(BookingSession.movie, innerjoin=True))
+        .filter(BookingSession.user_id == user_id)
+        .all()
+    )
+
+
+def get_future_bookings_by_user(db: Session, user_id: int) -> list[BookingRow]:
+    """
+    Возвращает будущие бронирования пользователя одним запросом.
+    Бронь соединяется с сеансом (JOIN), фильтрация по времени и сортировка выполняются в SQL.
+    Читаются только выводимые в профиле колонки, description сеанса не загружается.
+    """
+    now = datetime.now()
+    rows = (
+        db.query(
+            BookingSession.id, MovieSession.movie, MovieSession.cinema, MovieSession.hall, MovieSession.time,
+            BookingSession.seat, MovieSession.seats_per_row, BookingSession.status
+        )
+        .join(BookingSession.movie)
+        .filter(BookingSession.user_id == user_id, MovieSession.time >= now)
+        .order_by(MovieSession.time.asc())
+        .all()
+    )
+    return [BookingRow(*row) for row in rows]
 
 
 def get_booking_by_id(db: Session, booking_id: int) -> BookingSession | None:
@@ -59,13 +362,35 @@ def get_booking_by_id(db: Session, booking_id: int) -> BookingSession | None:
 def delete_booking(db: Session, booking_id: int) -> BookingSession | None:
     """
     Удаляет бронь по ID и возвращает её.
-    При удалении увеличивает количество свободных мест на сеансе.
+    При удалении атомарно освобождает место в схеме зала и увеличивает количество свободных мест.
     """
     booking = db.query(BookingSession).filter(BookingSession.id == booking_id).first()
     if booking:
-        session = db.query(MovieSession).filter(MovieSession.id == booking.movie_id).first()
-        if session:
-            session.seats += 1  # возвращаем место
+        seats = [booking.seat] if booking.seat is not None else []
         db.delete(booking)
+        seats_left = _change_seats(db, booking.movie_id, seats, SEAT_FREE, expected=None, seats_delta=1)
         db.commit()
+        _publish(booking.movie_id, seats_left, seats, SEAT_FREE)
+        bookings.inc(action="cancelled")
     return booking
+
+
+def iter_bookings_for_export(db: Session, batch_size: int) -> tuple[list[str], Iterator[list]]:
+    """
+    Потоково читает все брони вместе с пользователем и сеансом (JOIN) для выгрузки.
+    yield_per держит в памяти не больше batch_size строк, результат отдаётся пачками.
+    Возвращает имена колонок и итератор пачек строк-кортежей.
+    """
+    result = db.execute(
+        select(
+            BookingSession.id.label("booking_id"), BookingSession.status, BookingSession.seat,
+            BookingSession.expires_at, UserSession.id.label("user_id"), UserSession.username,
+            MovieSession.id.label("session_id"), MovieSession.movie, MovieSession.cinema,
+            MovieSession.hall, MovieSession.time
+        )
+        .join(UserSession, BookingSession.user_id == UserSession.id)
+        .join(MovieSession, BookingSession.movie_id == MovieSession.id)
+        .order_by(BookingSession.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return list(result.keys()), result.partitions()
@@ -1,16 +1,201 @@
+import base64
+from dataclasses import dataclass
+from sqlalchemy import tuple_, insert, select, delete, or_, func
 from sqlalchemy.orm import Session
-from typing import Type
-from datetime import datetime
+from typing import Type, Iterator
+from datetime import datetime, time, timedelta
 
-from app.database.models import MovieSession
-from app.utils.schemas import MovieSessionFull
+from app.metrics import bookings
+from app.database.models import MovieSession, BookingSession
+from app.database.coherence import bump_version
+from app.database.seat_map import new_seat_map
+from app.database.seat_events import seat_events, SESSION_DELETED_EVENT
+from app.database.search_index import movies_fts, build_match_query, search_rank, search_terms
+from app.database.session import is_sqlite
+from app.database.schedule_cache import schedule_cache, ScheduleItem, SCHEDULE_COLUMNS
+from app.utils.schemas import MovieSessionFull, SessionFilters
+
+
+@dataclass(slots=True)
+class SessionRow:
+    """
+    Строка списка сеансов для админ-панели: только выводимые колонки, без ORM-инструментирования.
+    """
+    id: int
+    movie: str
+    description: str | None
+    cinema: str
+    time: datetime
+    hall: str
+    seats: int
+    duration: int
+
+
+# Колонки, которые читаются для строк списка админ-панели
+SESSION_ROW_COLUMNS = (
+    MovieSession.id, MovieSession.movie, MovieSession.description, MovieSession.cinema,
+    MovieSession.time, MovieSession.hall, MovieSession.seats, MovieSession.duration
+)
+
+
+def conflicts_as_dicts(rows: list[SessionRow]) -> list[dict]:
+    """Пересекающиеся сеансы для JSON-ответа: id, фильм, начало и длительность."""
+    return [
+        {"id": row.id, "movie": row.movie, "time": row.time.isoformat(), "duration": row.duration}
+        for row in rows
+    ]
+
+
+class HallConflictError(ValueError):
+    """
+    Сеанс пересекается по времени с другими сеансами того же зала.
+    conflicts — пересекающиеся сеансы, next_free — ближайшее время начала, когда зал свободен.
+    """
+
+    def __init__(self, conflicts: list[SessionRow], next_free: datetime | None = None):
+        super().__init__("Hall is busy at this time")
+        self.conflicts = conflicts
+        self.next_free = next_free
+
+    def as_dict(self) -> dict:
+        return {
+            "detail": str(self),
+            "conflicts": conflicts_as_dicts(self.conflicts),
+            "next_free_slot": self.next_free.isoformat() if self.next_free else None,
+        }
+
+
+@dataclass(slots=True)
+class BatchConflict:
+    """
+    Конфликт сеанса из пачки: пересекающиеся сеансы из базы
+    и/или позиция в пачке более раннего сеанса, с которым он пересекается.
+    """
+    sessions: list[SessionRow]
+    batch_index: int | None = None
+
+
+def _session_end(start: datetime, duration: int) -> datetime:
+    return start + timedelta(minutes=duration)
+
+
+def _hall_select(db: Session, columns: tuple, cinema: str, hall: str, start: datetime):
+    """
+    Колонки columns сеансов зала, которые могут закончиться после start, по возрастанию времени.
+    Ни один сеанс зала не длиннее самого длинного, поэтому начавшиеся раньше start минус его длительность
+    уже закончились: запрос читает диапазон индекса (cinema, hall, time), а не все сеансы зала.
+    Длительность берётся из базы, а не из SESSION_MAX_DURATION: сеансы, созданные до ограничения
+    или при большем его значении, могут быть длиннее.
+    Core select вместо db.query: проверка выполняется на каждое создание сеанса,
+    и сборка ORM-запроса стоила бы больше самого чтения индекса.
+    """
+    longest = db.scalar(
+        select(func.max(MovieSession.duration)).where(MovieSession.cinema == cinema, MovieSession.hall == hall)
+    )
+    return (
+        select(*columns)
+        .where(
+            MovieSession.cinema == cinema,
+            MovieSession.hall == hall,
+            MovieSession.time > start - timedelta(minutes=longest or 0)
+        )
+        .order_by(MovieSession.time.asc(), MovieSession.id.asc())
+    )
+
+
+def find_hall_conflicts(
+        db: Session,
+        cinema: str,
+        hall: str,
+        start: datetime,
+        duration: int,
+        exclude_id: int | None = None
+) -> list[SessionRow]:
+    """
+    Возвращает сеансы того же зала, пересекающиеся с интервалом [start, start + duration).
+    Сеансы, идущие встык (один заканчивается, когда начинается другой), не пересекаются.
+    exclude_id — сеанс, который не нужно учитывать (например, сам изменяемый сеанс).
+    """
+    end = _session_end(start, duration)
+    rows = db.execute(_hall_select(db, SESSION_ROW_COLUMNS, cinema, hall, start).where(MovieSession.time < end)).all()
+    return [
+        SessionRow(*row) for row in rows
+        if _session_end(row.time, row.duration) > start and row.id != exclude_id
+    ]
+
+
+def find_next_free_slot(db: Session, cinema: str, hall: str, start: datetime, duration: int) -> datetime:
+    """
+    Ближайшее время не раньше start, когда зал свободен на duration минут.
+    Идёт по сеансам зала в порядке времени и сдвигает начало за конец каждого пересекающегося,
+    пока не найдётся окно; читает сеансы потоково и останавливается на первом подходящем окне.
+    """
+    candidate = start
+    result = db.execute(_hall_select(db, (MovieSession.time, MovieSession.duration), cinema, hall, start))
+    try:
+        for row in result:
+            if row.time >= _session_end(candidate, duration):
+                break
+            candidate = max(candidate, _session_end(row.time, row.duration))
+    finally:
+        result.close()
+    return candidate
+
+
+def find_batch_conflicts(db: Session, sessions_data: list[MovieSessionFull]) -> dict[int, BatchConflict]:
+    """
+    Проверяет пачку новых сеансов на пересечения с сеансами в базе и друг с другом.
+    Возвращает конфликты по позициям в пачке (пустой словарь — конфликтов нет).
+    Внутри пачки сеансы каждого зала сортируются по времени, и каждый сравнивается
+    с предыдущим принятым: принятые не пересекаются, поэтому он заканчивается позже всех.
+    """
+    conflicts: dict[int, BatchConflict] = {}
+    halls: dict[tuple[str, str], list[int]] = {}
+    for index, session_data in enumerate(sessions_data):
+        halls.setdefault((session_data.cinema, session_data.hall), []).append(index)
+        existing = find_hall_conflicts(
+            db, session_data.cinema, session_data.hall, session_data.time, session_data.duration
+        )
+        if existing:
+            conflicts[index] = BatchConflict(existing)
+
+    for indexes in halls.values():
+        indexes.sort(key=lambda i: sessions_data[i].time)
+        latest, latest_end = None, None
+        for index in indexes:
+            # Отклонённые сеансы не будут созданы и не мешают следующим
+            if index in conflicts:
+                continue
+            session_data = sessions_data[index]
+            if latest is not None and session_data.time < latest_end:
+                conflicts[index] = BatchConflict([], latest)
+                continue
+            latest, latest_end = index, _session_end(session_data.time, session_data.duration)
+    return conflicts
 
 
 def create_session(db: Session, session_data: MovieSessionFull) -> MovieSession:
     """
     Создает новый сеанс фильма в базе данных.
     Добавляет объект MovieSession в сессию, коммитит и возвращает его.
+    Если зал в это время занят, откатывает транзакцию и выбрасывает HallConflictError
+    с пересекающимися сеансами и ближайшим свободным временем.
+    После коммита добавляет сеанс в кэш расписания, версия канала schedule
+    сообщает об изменении другим воркерам.
     """
+    # Версия канала увеличивается до проверки: UPDATE берёт блокировку записи SQLite,
+    # и другой процесс не вставит пересекающийся сеанс между проверкой и вставкой
+    shared_version = bump_version(db, "schedule")
+    conflicts = find_hall_conflicts(
+        db, session_data.cinema, session_data.hall, session_data.time, session_data.duration
+    )
+    if conflicts:
+        next_free = find_next_free_slot(
+            db, session_data.cinema, session_data.hall, session_data.time, session_data.duration
+        )
+        db.rollback()
+        raise HallConflictError(conflicts, next_free)
+
     session = MovieSession(
         movie=session_data.movie,
         cinema=session_data.cinema,
@@ -18,14 +203,58 @@ def create_session(db: Session, session_data: MovieSessionFull) -> MovieSession:
         time=session_data.time,
         hall=session_data.hall,
         seats=session_data.seats,
-        duration=session_data.duration
+        duration=session_data.duration,
+        seat_map=new_seat_map(session_data.seats),
+        seats_per_row=session_data.seats_per_row
     )
     db.add(session)
     db.commit()
     db.refresh(session)
+    schedule_cache.add(session, shared_version)
     return session
 
 
+def create_sessions_bulk(
+        db: Session,
+        sessions_data: list[MovieSessionFull],
+        skip_conflicts: bool = False
+) -> tuple[int, dict[int, BatchConflict]]:
+    """
+    Создает пачку сеансов одним INSERT (executemany) и одним коммитом.
+    Пересечения в зале проверяются в той же транзакции, после взятия блокировки записи.
+    По умолчанию при пересечении выбрасывает HallConflictError для первого конфликтующего сеанса;
+    с skip_conflicts=True конфликтующие сеансы не вставляются, а остальные создаются.
+    Возвращает количество созданных сеансов и конфликты по позициям в пачке.
+    При ошибке откатывает всю пачку и пробрасывает исключение. После коммита сбрасывает кэш расписания.
+    """
+    if not sessions_data:
+        return 0, {}
+    try:
+        shared_version = bump_version(db, "schedule")
+        conflicts = find_batch_conflicts(db, sessions_data)
+        if conflicts and not skip_conflicts:
+            index = min(conflicts)
+            session_data = sessions_data[index]
+            raise HallConflictError(conflicts[index].sessions, find_next_free_slot(
+                db, session_data.cinema, session_data.hall, session_data.time, session_data.duration
+            ))
+        accepted = [session_data for index, session_data in enumerate(sessions_data) if index not in conflicts]
+        if accepted:
+            db.execute(
+                insert(MovieSession),
+                [
+                    {**session_data.model_dump(), "seat_map": new_seat_map(session_data.seats)}
+                    for session_data in accepted
+                ]
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    schedule_cache.invalidate(shared_version)
+    return len(accepted), conflicts
+
+
 def get_sessions(db: Session, mode: bool = False) -> list[Type[MovieSession]]:
     """
     Получает список сеансов из базы.
@@ -42,6 +271,134 @@ def get_sessions(db: Session, mode: bool = False) -> list[Type[MovieSession]]:
     return db.query(MovieSession).order_by(MovieSession.time.asc()).all()
 
 
+def encode_cursor(key: tuple[datetime, int]) -> str:
+    """
+    Кодирует позицию (time, id) последнего сеанса страницы в строку курсора.
+    """
+    session_time, session_id = key
+    raw = f"{session_time.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Декодирует строку курсора обратно в позицию (time, id).
+    При некорректном курсоре выбрасывает ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        session_time, session_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(session_time), int(session_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _filtered_query(
+        db: Session,
+        columns: tuple,
+        filters: SessionFilters,
+        after: tuple[datetime, int] | None,
+        mode: bool
+):
+    """
+    Строит запрос по выбранным колонкам с фильтрами и позицией keyset-пагинации.
+    """
+    query = db.query(*columns)
+    if mode:
+        query = query.filter(MovieSession.time >= datetime.now())
+    if filters.cinema:
+        query = query.filter(MovieSession.cinema == filters.cinema)
+    if filters.hall:
+        query = query.filter(MovieSession.hall == filters.hall)
+    if filters.movie:
+        query = query.filter(MovieSession.movie == filters.movie)
+    if filters.date_from:
+        query = query.filter(MovieSession.time >= datetime.combine(filters.date_from, time.min))
+    if filters.date_to:
+        query = query.filter(MovieSession.time < datetime.combine(filters.date_to + timedelta(days=1), time.min))
+    if after:
+        # Сравнение кортежей (time, id) > (?, ?): индекс по time в SQLite уже содержит rowid (id)
+        query = query.filter(tuple_(MovieSession.time, MovieSession.id) > tuple_(*after))
+    return query.order_by(MovieSession.time.asc(), MovieSession.id.asc())
+
+
+def _page(rows: list, limit: int) -> tuple[list, tuple[datetime, int] | None]:
+    """
+    Отрезает лишнюю запись (запрошенную ради проверки следующей страницы) и вычисляет позицию.
+    """
+    next_key = (rows[limit - 1].time, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_key
+
+
+def get_sessions_page(
+        db: Session,
+        filters: SessionFilters,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 30,
+        mode: bool = False
+) -> tuple[list[SessionRow], tuple[datetime, int] | None]:
+    """
+    Возвращает страницу сеансов, отсортированных по (time, id), и позицию для следующей страницы.
+    Пагинация keyset: следующая страница начинается строго после позиции after,
+    поэтому стоимость запроса не зависит от номера страницы (в отличие от OFFSET).
+    Фильтры по кинотеатру, залу и фильму — точные совпадения по индексированным колонкам.
+    Если mode=True — только будущие сеансы.
+    Строки читаются как кортежи колонок, без ORM-объектов и identity map.
+    """
+    # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+    rows = _filtered_query(db, SESSION_ROW_COLUMNS, filters, after, mode).limit(limit + 1).all()
+    return _page([SessionRow(*row) for row in rows], limit)
+
+
+def get_schedule_page(
+        db: Session,
+        filters: SessionFilters,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 30
+) -> tuple[list[ScheduleItem], tuple[datetime, int] | None]:
+    """
+    Возвращает страницу предстоящих сеансов для главной страницы с учётом фильтров.
+    Читает только id, название, кинотеатр и время — description не загружается.
+    """
+    rows = _filtered_query(db, SCHEDULE_COLUMNS, filters, after, mode=True).limit(limit + 1).all()
+    return _page([ScheduleItem(*row) for row in rows], limit)
+
+
+def search_sessions(db: Session, text: str, filters: SessionFilters, limit: int = 30) -> list[ScheduleItem]:
+    """
+    Полнотекстовый поиск предстоящих сеансов по названию, описанию и кинотеатру.
+    Все слова запроса обязательны, последнее ищется как префикс; результаты отсортированы
+    по релевантности (bm25), при равной — по времени. Ранжируются все предстоящие совпадения,
+    поэтому лучшие не теряются, сколько бы сеансов ни подошло под запрос.
+    Фильтры (кинотеатр, зал, даты) применяются как на главной.
+    В SQLite поиск идёт по индексу FTS5; в других СУБД — по LIKE без ранжирования.
+    """
+    if is_sqlite:
+        match = build_match_query(text)
+        if match is None:
+            return []
+        query = (
+            _filtered_query(db, SCHEDULE_COLUMNS, filters, None, mode=True)
+            .join(movies_fts, movies_fts.c.rowid == MovieSession.id)
+            .filter(movies_fts.c.movies_fts.op("MATCH")(match))
+            .order_by(None)
+            .order_by(search_rank(), MovieSession.time.asc())
+        )
+    else:
+        terms = search_terms(text)
+        if not terms:
+            return []
+        query = _filtered_query(db, SCHEDULE_COLUMNS, filters, None, mode=True)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(
+                MovieSession.movie.ilike(pattern),
+                MovieSession.description.ilike(pattern),
+                MovieSession.cinema.ilike(pattern)
+            ))
+    return [ScheduleItem(*row) for row in query.limit(limit).all()]
+
+
 def get_session_by_id(db: Session, session_id: int) -> Type[MovieSession] | None:
     """
     Получает сеанс по его ID.
@@ -50,13 +407,93 @@ def get_session_by_id(db: Session, session_id: int) -> Type[MovieSession] | None
     return db.query(MovieSession).filter(MovieSession.id == session_id).first()
 
 
-def delete_session(db: Session, session_id: int) -> Type[MovieSession] | None:
+def get_session_version(db: Session, session_id: int) -> int | None:
     """
-    Удаляет сеанс из базы по ID.
-    Возвращает удаленный объект MovieSession или None, если сеанс не найден.
+    Возвращает версию мест сеанса (seat_version) одним запросом по первичному ключу.
+    Используется для ETag: по ней отвечаем 304, не читая сеанс целиком. None — сеанс не найден.
     """
-    session = db.query(MovieSession).filter(MovieSession.id == session_id).first()
-    if session:
-        db.delete(session)
-        db.commit()
-    return session
+    return (
+        db.query(MovieSession.seat_version)
+        .filter(MovieSession.id == session_id)
+        .scalar()
+    )
+
+
+def get_seat_state(db: Session, session_id: int) -> tuple[int, bytes | None] | None:
+    """
+    Возвращает количество свободных мест и схему зала сеанса одним узким запросом.
+    Используется для начального снимка живой доступности мест. None — сеанс не найден.
+    """
+    row = (
+        db.query(MovieSession.seats, MovieSession.seat_map)
+        .filter(MovieSession.id == session_id)
+        .first()
+    )
+    return tuple(row) if row is not None else None
+
+
+@dataclass(slots=True)
+class DeletedSession:
+    """
+    Удалённый сеанс и пользователи, чьи брони удалены вместе с ним (для уведомлений).
+    """
+    id: int
+    movie: str
+    cinema: str
+    time: datetime
+    user_ids: list[int]
+
+
+def delete_session(db: Session, session_id: int) -> DeletedSession | None:
+    """
+    Удаляет сеанс из базы по ID вместе со всеми его бронями в одной транзакции.
+    Брони удаляет база каскадом (ON DELETE CASCADE, старые базы доводит до него миграция),
+    они не загружаются как ORM-объекты, сколько бы их ни было; читаются только id затронутых пользователей.
+    Возвращает DeletedSession или None, если сеанс не найден.
+    После коммита убирает сеанс из кэша расписания и сообщает об удалении открытым страницам сеанса.
+    """
+    # Версия канала увеличивается первой: UPDATE берёт блокировку записи, и между чтением
+    # пользователей и удалением никто не создаст новую бронь на этот сеанс
+    shared_version = bump_version(db, "schedule")
+    row = db.execute(
+        select(MovieSession.id, MovieSession.movie, MovieSession.cinema, MovieSession.time)
+        .where(MovieSession.id == session_id)
+    ).first()
+    if row is None:
+        db.rollback()
+        return None
+
+    user_ids = list(db.scalars(
+        select(BookingSession.user_id).where(BookingSession.movie_id == session_id).distinct()
+    ))
+    db.execute(
+        delete(MovieSession).where(MovieSession.id == session_id),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    schedule_cache.remove(session_id, shared_version)
+    seat_events.broadcast(session_id, SESSION_DELETED_EVENT)
+    # У пользователя не больше одной брони на сеанс: пользователей столько же, сколько броней
+    bookings.inc(len(user_ids), action="cancelled")
+    return DeletedSession(*row, user_ids)
+
+
+# Колонки выгрузки сеансов (без бинарной схемы зала)
+EXPORT_SESSION_COLUMNS = (
+    MovieSession.id, MovieSession.movie, MovieSession.cinema, MovieSession.hall, MovieSession.time,
+    MovieSession.duration, MovieSession.seats, MovieSession.seats_per_row, MovieSession.description
+)
+
+
+def iter_sessions_for_export(db: Session, batch_size: int) -> tuple[list[str], Iterator[list]]:
+    """
+    Потоково читает все сеансы для выгрузки: yield_per держит в памяти не больше
+    batch_size строк, результат отдаётся пачками (partitions).
+    Возвращает имена колонок и итератор пачек строк-кортежей.
+    """
+    result = db.execute(
+        select(*EXPORT_SESSION_COLUMNS)
+        .order_by(MovieSession.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return list(result.keys()), result.partitions()
@@ -0,0 +1,196 @@
+from datetime import datetime
+from sqlalchemy import MetaData, bindparam, select, update, delete, func
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from app.config import DEFAULT_SEATS_PER_ROW
+from app.database.models import Base, MovieSession, BookingSession, UserSession, CacheVersion
+from app.database.seat_map import SEAT_FREE, SEAT_BOOKED, new_seat_map, set_seat
+from app.logger import logger
+
+# create_all создаёт только отсутствующие таблицы и не меняет существующие.
+# Базы, созданные прежними версиями, доводятся до текущей схемы здесь, при каждом старте:
+# каждый шаг сначала проверяет, нужен ли он, поэтому повторный запуск ничего не меняет.
+
+# Колонки, добавленные к существующим таблицам: имя -> определение для ALTER TABLE ADD COLUMN.
+# NOT NULL-колонки получают значение по умолчанию, которым заполняются уже существующие строки
+ADDED_COLUMNS = {
+    "movies": {
+        "seat_map": "BLOB",
+        "seats_per_row": f"INTEGER NOT NULL DEFAULT {DEFAULT_SEATS_PER_ROW}",
+        "seat_version": "INTEGER NOT NULL DEFAULT 0",
+    },
+    "booking": {
+        "seat": "INTEGER",
+        "status": "VARCHAR(16) NOT NULL DEFAULT 'confirmed'",
+        "expires_at": "DATETIME",
+    },
+    "cache_versions": {
+        "updated_at": "DATETIME",
+    },
+}
+
+
+def _columns(connection: Connection, table: str) -> set[str]:
+    return {row.name for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _has_unique_index(connection: Connection, table: str, columns: tuple[str, ...]) -> bool:
+    """Есть ли у таблицы уникальный индекс (или ограничение UNIQUE) ровно по columns."""
+    for index in connection.exec_driver_sql(f"PRAGMA index_list({table})").all():
+        if not index.unique:
+            continue
+        indexed = tuple(row.name for row in connection.exec_driver_sql(f"PRAGMA index_info('{index.name}')"))
+        if indexed == columns:
+            return True
+    return False
+
+
+def _ensure_unique_index(connection: Connection, table: str, name: str, columns: tuple[str, ...]) -> None:
+    """Уникальное ограничение из модели для таблицы, созданной без него, — в виде уникального индекса."""
+    if not _has_unique_index(connection, table, columns):
+        connection.exec_driver_sql(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        logger.info(f"Миграция: создан уникальный индекс {name}")
+
+
+def add_missing_columns(connection: Connection) -> None:
+    """Добавляет колонки, которых нет в таблицах, созданных прежними версиями."""
+    for table, columns in ADDED_COLUMNS.items():
+        existing = _columns(connection, table)
+        for name, definition in columns.items():
+            if name not in existing:
+                connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                logger.info(f"Миграция: добавлена колонка {table}.{name}")
+
+
+def stamp_cache_versions(connection: Connection) -> None:
+    """Время изменения каналов, созданных без него: момент миграции (одинаковый для всех воркеров)."""
+    connection.execute(
+        update(CacheVersion).where(CacheVersion.updated_at.is_(None)).values(updated_at=datetime.now())
+    )
+
+
+def ensure_single_booking_per_user(connection: Connection) -> None:
+    """
+    Один пользователь — одна бронь на сеанс: уникальный индекс (user_id, movie_id).
+    Прежние версии проверяли повтор отдельным запросом, и гонка могла оставить дубликаты:
+    перед созданием индекса остаётся самая ранняя бронь, а места лишних возвращаются сеансу.
+    """
+    if _has_unique_index(connection, "booking", ("user_id", "movie_id")):
+        return
+    first_bookings = select(func.min(BookingSession.id)).group_by(BookingSession.user_id, BookingSession.movie_id)
+    duplicates = connection.execute(
+        select(BookingSession.id, BookingSession.movie_id, BookingSession.seat)
+        .where(BookingSession.id.not_in(first_bookings))
+    ).all()
+    for _, movie_id, seat in duplicates:
+        seat_map = connection.scalar(select(MovieSession.seat_map).where(MovieSession.id == movie_id))
+        values = {"seats": MovieSession.seats + 1, "seat_version": MovieSession.seat_version + 1}
+        if seat_map is not None and seat is not None and 0 <= seat < len(seat_map):
+            values["seat_map"] = set_seat(seat_map, seat, SEAT_FREE)
+        connection.execute(update(MovieSession).where(MovieSession.id == movie_id).values(**values))
+    if duplicates:
+        connection.execute(delete(BookingSession).where(BookingSession.id.in_([row.id for row in duplicates])))
+        logger.info(f"Миграция: удалено повторных броней: {len(duplicates)}")
+    _ensure_unique_index(connection, "booking", "uq_booking_user_movie", ("user_id", "movie_id"))
+
+
+def ensure_seat_index(connection: Connection) -> None:
+    """Одно место — одна бронь: уникальный индекс (movie_id, seat)."""
+    _ensure_unique_index(connection, "booking", "uq_booking_movie_seat", ("movie_id", "seat"))
+
+
+def backfill_seat_maps(connection: Connection) -> None:
+    """
+    Строит схему зала для сеансов, созданных до появления мест.
+    В таких сеансах seats — число свободных мест, а брони без номера места уже заняли свои:
+    схема получает seats + броней мест, первые места отдаются этим броням по порядку id.
+    """
+    rows = connection.execute(
+        select(MovieSession.id, MovieSession.seats).where(MovieSession.seat_map.is_(None))
+    ).all()
+    assign_seat = (
+        update(BookingSession)
+        .where(BookingSession.id == bindparam("booking_id"))
+        .values(seat=bindparam("seat_number"))
+    )
+    for session_id, seats_left in rows:
+        booking_ids = connection.execute(
+            select(BookingSession.id)
+            .where(BookingSession.movie_id == session_id, BookingSession.seat.is_(None))
+            .order_by(BookingSession.id)
+        ).scalars().all()
+        seat_map = bytes([SEAT_BOOKED]) * len(booking_ids) + new_seat_map(max(seats_left, 0))
+        connection.execute(update(MovieSession).where(MovieSession.id == session_id).values(seat_map=seat_map))
+        if booking_ids:
+            connection.execute(assign_seat, [
+                {"booking_id": booking_id, "seat_number": number} for number, booking_id in enumerate(booking_ids)
+            ])
+    if rows:
+        logger.info(f"Миграция: построены схемы зала для {len(rows)} сеансов")
+
+
+def cascade_booking_deletes(connection: Connection) -> None:
+    """
+    Брони удаляются вместе с сеансом: внешний ключ booking.movie_id с ON DELETE CASCADE.
+    SQLite не меняет внешние ключи существующей таблицы, поэтому она пересоздаётся:
+    новая таблица по модели, копирование строк, замена старой (индексы создаёт следующий шаг).
+    Брони удалённых сеансов и пользователей, которые прежние версии оставляли, не копируются.
+    """
+    foreign_keys = connection.exec_driver_sql("PRAGMA foreign_key_list(booking)").all()
+    if any(fk.table == "movies" and fk.on_delete.upper() == "CASCADE" for fk in foreign_keys):
+        return
+    connection.execute(delete(BookingSession).where(
+        BookingSession.movie_id.not_in(select(MovieSession.id)) | BookingSession.user_id.not_in(select(UserSession.id))
+    ))
+    table = BookingSession.__table__
+    # Копия схемы вне метаданных приложения; таблицы, на которые ссылаются внешние ключи, нужны для DDL
+    metadata = MetaData()
+    for referenced in (MovieSession.__table__, UserSession.__table__):
+        referenced.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name="booking_rebuilt")
+    columns = ", ".join(column.name for column in table.columns)
+    connection.exec_driver_sql("DROP TABLE IF EXISTS booking_rebuilt")
+    connection.execute(CreateTable(rebuilt))
+    connection.exec_driver_sql(f"INSERT INTO booking_rebuilt ({columns}) SELECT {columns} FROM booking")
+    connection.exec_driver_sql("DROP TABLE booking")
+    connection.exec_driver_sql("ALTER TABLE booking_rebuilt RENAME TO booking")
+    logger.info("Миграция: таблица booking пересоздана с ON DELETE CASCADE")
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    """Индексы моделей, которых нет у таблиц, созданных до их появления."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# Шаги по порядку: каждый рассчитывает на результат предыдущих
+MIGRATIONS = (
+    add_missing_columns,
+    stamp_cache_versions,
+    ensure_single_booking_per_user,
+    ensure_seat_index,
+    backfill_seat_maps,
+    cascade_booking_deletes,
+    create_missing_indexes,
+)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Доводит существующую базу SQLite до схемы моделей (вызывать после create_all).
+    Все шаги выполняются в одной транзакции BEGIN IMMEDIATE: при нескольких воркерах
+    миграцию выполняет первый, остальные ждут блокировку и видят, что делать уже нечего.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            for step in MIGRATIONS:
+                step(connection)
+        except Exception:
+            connection.rollback()
+            raise
+        connection.commit()
@@ -1,11 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Index, LargeBinary, event, insert
+)
 from sqlalchemy.orm import relationship
 
 from app.database.session import Base
+from app.database.search_index import create_search_index
 
 
 class MovieSession(Base):
     __tablename__ = 'movies'
+    __table_args__ = (
+        # сеансы зала по времени: проверка пересечений читает узкий диапазон индекса
+        Index('ix_movies_cinema_hall_time', 'cinema', 'hall', 'time'),
+        # самый длинный сеанс зала — одним чтением индекса, без обхода сеансов зала
+        Index('ix_movies_cinema_hall_duration', 'cinema', 'hall', 'duration'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     movie = Column(String(100), index=True, nullable=False)      # название фильма
@@ -13,10 +23,14 @@ class MovieSession(Base):
     cinema = Column(String(100), index=True, nullable=False)     # кинотеатр
     time = Column(DateTime, index=True, nullable=False)          # время сеанса
     hall = Column(String(50), index=True, nullable=False)        # зал
-    seats = Column(Integer, index=True, nullable=False)          # всего мест
+    seats = Column(Integer, index=True, nullable=False)          # свободных мест
     duration = Column(Integer, nullable=False)                   # длительность в минутах
+    seat_map = Column(LargeBinary, nullable=True)                # схема зала: байт-статус на место
+    seats_per_row = Column(Integer, nullable=False, default=10)  # мест в ряду
+    seat_version = Column(Integer, nullable=False, default=0)    # версия схемы для атомарных обновлений
 
-    bookings = relationship("BookingSession", back_populates="movie")
+    # Брони удаляются базой (ON DELETE CASCADE), ORM не загружает их при удалении сеанса
+    bookings = relationship("BookingSession", back_populates="movie", passive_deletes=True)
 
 
 class UserSession(Base):
@@ -31,11 +45,46 @@ class UserSession(Base):
 
 class BookingSession(Base):
     __tablename__ = 'booking'
+    __table_args__ = (
+        # один пользователь — одна бронь на сеанс; заменяет проверку отдельным запросом
+        UniqueConstraint('user_id', 'movie_id', name='uq_booking_user_movie'),
+        # одно место — одна бронь
+        UniqueConstraint('movie_id', 'seat', name='uq_booking_movie_seat'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    movie_id = Column(Integer, ForeignKey('movies.id'), nullable=False)
+    movie_id = Column(Integer, ForeignKey('movies.id', ondelete='CASCADE'), nullable=False)
+    seat = Column(Integer, nullable=True)                                  # номер места в схеме зала
+    status = Column(String(16), nullable=False, default="confirmed")      # held / confirmed
+    expires_at = Column(DateTime, nullable=True, index=True)               # окончание удержания места
 
     user = relationship("UserSession", back_populates="bookings")
     movie = relationship("MovieSession", back_populates="bookings")
+
+
+# Каналы межпроцессной инвалидации кэшей: расписание сеансов
+CACHE_CHANNELS = ("schedule",)
+
+
+class CacheVersion(Base):
+    __tablename__ = 'cache_versions'
+
+    name = Column(String(32), primary_key=True)           # канал: schedule
+    version = Column(Integer, nullable=False, default=0)  # растёт при каждом изменении данных канала
+    updated_at = Column(DateTime, nullable=True)          # время последнего изменения (для Last-Modified)
+
+
+@event.listens_for(CacheVersion.__table__, "after_create")
+def _seed_cache_versions(table, connection, **kwargs):
+    """Создаёт строки каналов сразу при создании таблицы, чтобы изменения только увеличивали версию."""
+    connection.execute(insert(table), [
+        {"name": name, "version": 0, "updated_at": datetime.now()} for name in CACHE_CHANNELS
+    ])
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(metadata, connection, **kwargs):
+    """Полнотекстовый индекс сеансов создаётся вместе с таблицами (см. search_index.py)."""
+    create_search_index(connection)
@@ -0,0 +1,181 @@
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_TOP_N, SLOW_QUERY_EXPLAIN
+from app.logger import logger
+
+# Модули, чьи функции считаются источником запроса
+CRUD_PACKAGE = "app.database.cruds."
+
+# Операторы, для которых можно получить план выполнения
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_in_list_re = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_spaces_re = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Приводит SQL к общему виду: литералы — к ?, списки IN (?, ?, ...) — к (?...),
+    пробелы — к одному. Запросы, отличающиеся только значениями, попадают в одну строку таблицы.
+    """
+    normalized = _literal_re.sub("?", statement)
+    normalized = _in_list_re.sub("(?...)", normalized)
+    return _spaces_re.sub(" ", normalized).strip()
+
+
+def find_caller() -> str:
+    """
+    Имя CRUD-функции, из которой выполняется запрос (booking_crud.create_booking).
+    Берётся самый внешний кадр стека из app.database.cruds: вспомогательные функции
+    вроде _take_seat относятся к вызвавшей их публичной функции.
+    Асинхронные CRUD идут через run_sync, поэтому их синхронная часть тоже видна в стеке.
+    """
+    caller = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(CRUD_PACKAGE):
+            caller = f"{module[len(CRUD_PACKAGE):]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return caller or "unknown"
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Статистика одного нормализованного запроса."""
+    statement: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    caller: str = "unknown"
+    plan: str | None = None
+
+    @property
+    def avg_ms(self) -> float:
+        return round(self.total / self.count * 1000, 2) if self.count else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return round(self.max * 1000, 2)
+
+    @property
+    def total_ms(self) -> float:
+        return round(self.total * 1000, 2)
+
+
+class QueryLog:
+    """
+    Журнал медленных запросов: время каждого SQL-запроса, источник (CRUD-функция),
+    запись в лог с планом выполнения для запросов дольше порога и таблица самых медленных
+    нормализованных запросов в памяти.
+    Поиск источника и EXPLAIN выполняются только для нового максимума запроса
+    или для медленного запроса, а не для каждого вызова.
+    """
+
+    def __init__(self, threshold_ms: float, top_n: int, explain: bool = True, max_statements: int = 500):
+        self.threshold = threshold_ms / 1000
+        self.top_n = top_n
+        self.explain = explain
+        self.max_statements = max_statements
+        self.statements: dict[str, QueryStats] = {}
+        self.lock = threading.Lock()
+
+    def record(self, conn, cursor, statement: str, parameters, elapsed: float, executemany: bool) -> None:
+        """Учитывает выполненный запрос; медленный пишет в лог вместе с планом."""
+        normalized = normalize_statement(statement)
+        with self.lock:
+            stats = self.statements.get(normalized)
+            if stats is None:
+                if len(self.statements) >= self.max_statements:
+                    # Вытесняем самый быстрый из известных запросов
+                    fastest = min(self.statements.values(), key=lambda item: item.max)
+                    del self.statements[fastest.statement]
+                stats = self.statements[normalized] = QueryStats(normalized)
+            stats.count += 1
+            stats.total += elapsed
+            new_max = elapsed > stats.max
+            if new_max:
+                stats.max = elapsed
+
+        is_slow = elapsed >= self.threshold
+        if not new_max and not is_slow:
+            return
+
+        caller = find_caller()
+        plan = self._explain(conn, statement, parameters) if is_slow and not executemany else None
+        with self.lock:
+            if new_max:
+                stats.caller = caller
+            if plan is not None:
+                stats.plan = plan
+
+        if is_slow:
+            message = f"Медленный запрос {elapsed * 1000:.1f} мс в {caller}: {normalized}"
+            if plan:
+                message += f"\nEXPLAIN:\n{plan}"
+            logger.warning(message)
+
+    def _explain(self, conn, statement: str, parameters) -> str | None:
+        """
+        План выполнения запроса: EXPLAIN QUERY PLAN для SQLite, EXPLAIN для остальных диалектов.
+        Выполняется отдельным курсором DBAPI, поэтому не попадает в журнал сам и не меняет данные.
+        """
+        if not self.explain or not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        # В SQLite последняя колонка — описание шага плана
+        return "\n".join(str(row[-1]) for row in rows)
+
+    def top(self, limit: int | None = None) -> list[QueryStats]:
+        """Самые медленные запросы по максимальному времени."""
+        with self.lock:
+            items = sorted(self.statements.values(), key=lambda item: item.max, reverse=True)
+        return items[:limit or self.top_n]
+
+    def reset(self) -> None:
+        """Очищает таблицу запросов."""
+        with self.lock:
+            self.statements.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_log_started"].pop()
+    query_log.record(conn, cursor, statement, parameters, elapsed, executemany)
+
+
+def _handle_error(context):
+    # Запрос упал: after_cursor_execute не будет, убираем его отметку времени
+    if context.connection is not None and context.connection.info.get("query_log_started"):
+        context.connection.info["query_log_started"].pop()
+
+
+def enable_query_log(engine: Engine) -> None:
+    """Подключает журнал медленных запросов к синхронному движку (или sync_engine асинхронного)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+query_log = QueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_TOP_N, SLOW_QUERY_EXPLAIN)
@@ -0,0 +1,220 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.database.models import MovieSession, CacheVersion
+
+
+# Колонки, которые читаются для записей расписания
+SCHEDULE_COLUMNS = (MovieSession.id, MovieSession.movie, MovieSession.cinema, MovieSession.time)
+
+
+@dataclass(slots=True)
+class ScheduleItem:
+    """
+    Облегчённая запись расписания для главной страницы.
+    Содержит только поля, которые выводятся в сетке сеансов.
+    """
+    id: int
+    movie: str
+    cinema: str
+    time: datetime
+
+    @property
+    def key(self) -> tuple[datetime, int]:
+        return self.time, self.id
+
+
+class ScheduleCache:
+    """
+    Кэш расписания предстоящих сеансов в памяти.
+    Список отсортирован по (time, id) и заменяется целиком при каждом изменении,
+    поэтому читатели получают неизменяемый снимок без копирования.
+    Создание и удаление сеанса обновляют кэш точечно, прошедшие сеансы
+    отбрасываются с начала списка без перезагрузки из базы.
+    Кэш помнит версию канала schedule, которую он отражает: изменения, закоммиченные этим
+    процессом, применяются точечно и не сбрасывают кэш, когда ту же версию увидит опрос.
+    """
+
+    def __init__(self):
+        self.items: list[ScheduleItem] | None = None
+        self.version = 0
+        # Версия канала schedule из cache_versions, которую отражает кэш (общая для всех воркеров)
+        self.shared_version: int | None = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.expired = 0
+
+    @staticmethod
+    def load(db: Session, now: datetime) -> list[ScheduleItem]:
+        """Загружает из базы только нужные колонки будущих сеансов, без description."""
+        rows = (
+            db.query(*SCHEDULE_COLUMNS)
+            .filter(MovieSession.time >= now)
+            .order_by(MovieSession.time.asc(), MovieSession.id.asc())
+            .all()
+        )
+        return [ScheduleItem(*row) for row in rows]
+
+    def get_upcoming(self, db: Session) -> list[ScheduleItem]:
+        """
+        Возвращает предстоящие сеансы, отсортированные по времени.
+        При первом обращении (или после сброса) загружает их из базы.
+        Если расписание изменилось во время загрузки, прочитанный список мог не увидеть
+        изменение: он возвращается этому запросу, но в кэш не сохраняется.
+        Версия канала читается до сеансов: список не старше версии, с которой он сохраняется.
+        """
+        now = datetime.now()
+        with self.lock:
+            if self.items is not None:
+                self.hits += 1
+                self._drop_past(now)
+                return self.items
+            self.misses += 1
+            version = self.version
+
+        shared_version = self.read_version(db)
+        items = self.load(db, now)
+        with self.lock:
+            if self.items is None and self.version == version and (self.shared_version or 0) <= shared_version:
+                self.items = items
+                self.shared_version = shared_version
+                self.reloads += 1
+            return self.items if self.items is not None else items
+
+    def get_page(
+            self,
+            db: Session,
+            after: tuple[datetime, int] | None,
+            limit: int
+    ) -> tuple[list[ScheduleItem], tuple[datetime, int] | None]:
+        """
+        Возвращает страницу предстоящих сеансов после позиции after (time, id)
+        и позицию для следующей страницы. Поиск начала страницы — бинарный, O(log n).
+        """
+        items = self.get_upcoming(db)
+        start = bisect_right(items, after, key=lambda item: item.key) if after else 0
+        page = items[start:start + limit]
+        next_key = page[-1].key if start + limit < len(items) else None
+        return page, next_key
+
+    @staticmethod
+    def read_version(db: Session) -> int:
+        """Текущая версия канала schedule из cache_versions."""
+        return db.scalar(select(CacheVersion.version).where(CacheVersion.name == "schedule"))
+
+    def get_version(self, db: Session) -> tuple[tuple, datetime]:
+        """
+        Возвращает версию расписания для ETag и время её изменения.
+        Версия одинакова у всех воркеров и после перезапуска: номер канала schedule
+        из cache_versions (меняется в одной транзакции с сеансами) и ключ первого
+        предстоящего сеанса (меняется, когда сеансы начинаются и уходят из расписания).
+        Время изменения тоже берётся из базы, поэтому у одного ETag один Last-Modified на всех воркерах:
+        момент последнего изменения канала или начала последнего начавшегося сеанса, если он позже.
+        Если канал изменил другой процесс, а кэш этого воркера ещё нет (опрос не успел),
+        кэш перечитывается: содержимое ответа не старше версии в его ETag.
+        """
+        last_started = select(func.max(MovieSession.time)).where(MovieSession.time < datetime.now())
+        shared_version, updated_at, started_at = db.execute(
+            select(CacheVersion.version, CacheVersion.updated_at, last_started.scalar_subquery())
+            .where(CacheVersion.name == "schedule")
+        ).one()
+        self.invalidate(shared_version)
+        items = self.get_upcoming(db)
+        # Время в базе локальное, как у сеансов
+        modified_at = max(updated_at, started_at or updated_at).astimezone(timezone.utc)
+        with self.lock:
+            return (shared_version, items[0].key if items else None), modified_at
+
+    def _touch(self) -> None:
+        """Отмечает изменение расписания: увеличивает версию (загрузки, начатые до него, не сохраняются)."""
+        self.version += 1
+
+    def _is_applied(self, shared_version: int) -> bool:
+        """Отражает ли кэш версию канала shared_version (версии только растут)."""
+        return self.shared_version is not None and shared_version <= self.shared_version
+
+    def _drop_past(self, now: datetime) -> None:
+        """
+        Отбрасывает уже начавшиеся сеансы с начала списка.
+        Это тоже изменение расписания, поэтому версия увеличивается.
+        """
+        if self.items and self.items[0].time < now:
+            index = bisect_left(self.items, (now, 0), key=lambda item: item.key)
+            self.items = self.items[index:]
+            self.expired += index
+            self._touch()
+
+    def add(self, session: MovieSession, shared_version: int) -> None:
+        """
+        Добавляет созданный сеанс в кэш, если он ещё не начался.
+        shared_version — версия канала, закоммиченная вместе с сеансом (см. _apply).
+        """
+        item = ScheduleItem(session.id, session.movie, session.cinema, session.time)
+
+        def apply(items: list[ScheduleItem]) -> list[ScheduleItem]:
+            if item.time < datetime.now():
+                return items
+            items = list(items)
+            insort(items, item, key=lambda entry: entry.key)
+            return items
+
+        self._apply(shared_version, apply)
+
+    def remove(self, session_id: int, shared_version: int) -> None:
+        """Удаляет сеанс из кэша по ID; shared_version — версия канала, закоммиченная с удалением."""
+        self._apply(shared_version, lambda items: [item for item in items if item.id != session_id])
+
+    def _apply(self, shared_version: int, apply) -> None:
+        """
+        Применяет изменение, закоммиченное этим процессом с версией канала shared_version.
+        Если кэш отражает предыдущую версию, список обновляется точечно и кэш запоминает
+        новую версию: ни get_version, ни опрос её уже не сбрасывают. Если между ними есть
+        чужие изменения, кэш сбрасывается; если версия уже отражена (кэш перечитан после
+        коммита), делать нечего.
+        """
+        with self.lock:
+            if self._is_applied(shared_version):
+                return
+            self._touch()
+            if self.items is not None and self.shared_version == shared_version - 1:
+                self.items = apply(self.items)
+            else:
+                self.items = None
+            self.shared_version = shared_version
+
+    def invalidate(self, shared_version: int | None = None) -> None:
+        """
+        Сбрасывает кэш: следующее чтение загрузит расписание заново.
+        С shared_version сбрасывает, только если кэш ещё не отражает эту версию канала
+        (изменение другого процесса), без неё — всегда.
+        """
+        with self.lock:
+            if shared_version is not None and self._is_applied(shared_version):
+                return
+            self._touch()
+            self.items = None
+            if shared_version is not None:
+                self.shared_version = shared_version
+
+    def stats(self) -> dict:
+        """Возвращает статистику попаданий и размер кэша."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.items) if self.items is not None else 0,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "reloads": self.reloads,
+                "expired": self.expired,
+            }
+
+
+schedule_cache = ScheduleCache()
@@ -0,0 +1,91 @@
+import re
+from sqlalchemy import column, func, literal_column, table
+
+# Полнотекстовый индекс сеансов (SQLite FTS5) по названию фильма, описанию и кинотеатру.
+# Внешнее содержимое (content='movies'): текст хранится только в movies, индекс — только токены.
+# prefix='2 3' — отдельные индексы префиксов, поиск "ма*" не перебирает весь словарь.
+SEARCH_INDEX_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        movie, description, cinema,
+        content='movies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, movie, description, cinema)
+        VALUES (new.id, new.movie, new.description, new.cinema);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, movie, description, cinema)
+        VALUES ('delete', old.id, old.movie, old.description, old.cinema);
+    END
+    """,
+    # Только при изменении индексируемых колонок: бронирования меняют места, а не текст
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF movie, description, cinema ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, movie, description, cinema)
+        VALUES ('delete', old.id, old.movie, old.description, old.cinema);
+        INSERT INTO movies_fts(rowid, movie, description, cinema)
+        VALUES (new.id, new.movie, new.description, new.cinema);
+    END
+    """,
+)
+
+# Таблица индекса для запросов: rowid — id сеанса, одноимённая скрытая колонка — для MATCH
+movies_fts = table("movies_fts", column("rowid"), column("movies_fts"))
+
+# Веса колонок в bm25: совпадение в названии важнее кинотеатра, кинотеатр — важнее описания
+SEARCH_WEIGHTS = (10.0, 1.0, 3.0)
+
+# Не больше стольких слов из запроса: длинные запросы не превращаются в дорогие пересечения
+SEARCH_MAX_TERMS = 8
+
+_term_re = re.compile(r"\w+")
+
+
+def create_search_index(connection) -> None:
+    """
+    Создаёт таблицу FTS5 и триггеры синхронизации с movies (только SQLite).
+    Безопасно вызывать при каждом старте. Если таблица создаётся для уже заполненной базы,
+    индекс строится по существующим сеансам.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'"
+    ).first()
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')")
+
+
+def search_terms(text: str) -> list[str]:
+    """Слова запроса (буквы и цифры), не больше SEARCH_MAX_TERMS."""
+    return _term_re.findall(text)[:SEARCH_MAX_TERMS]
+
+
+def build_match_query(text: str) -> str | None:
+    """
+    Переводит ввод пользователя в запрос FTS5: все слова обязательны, последнее ищется
+    как префикс ("тарковский сол"*), чтобы находить недописанное слово.
+    Полные слова — точные термины: префиксный поиск по каждому слову сливает списки
+    документов всех подходящих терминов и заметно дороже.
+    Слова берутся в кавычки, поэтому операторы FTS5 (OR, NEAR, -, :) из ввода не интерпретируются.
+    None — в запросе нет ни одного слова.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return None
+    phrases = [f'"{term}"' for term in terms]
+    phrases[-1] += "*"
+    return " ".join(phrases)
+
+
+def search_rank():
+    """Выражение релевантности bm25 (меньше — лучше) для сортировки результатов."""
+    return func.bm25(literal_column("movies_fts"), *SEARCH_WEIGHTS)
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+
+from app.config import SEAT_EVENTS_QUEUE_SIZE
+
+
+@dataclass(slots=True, eq=False)
+class SeatSubscriber:
+    """
+    Подписчик на изменения мест сеанса: очередь событий и цикл событий, в котором её читают.
+    Сравнивается по идентичности, чтобы храниться в множестве подписчиков.
+    """
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+
+
+def snapshot_event(seats: int, seat_map: bytes | None) -> dict:
+    """Событие с полным состоянием мест: количество и строка статусов, по символу на место."""
+    return {"seats": seats, "map": "".join(map(str, seat_map)) if seat_map is not None else None}
+
+
+# Событие для подписчиков удалённого сеанса: страница сообщает об отмене, поток закрывается
+SESSION_DELETED_EVENT = {"deleted": True}
+
+
+class SeatEvents:
+    """
+    Внутрипроцессный pub/sub изменений свободных мест по сеансам.
+    CRUD публикует одно событие после коммита, а оно раздаётся всем подписчикам сеанса,
+    поэтому N открытых страниц стоят одного обновления, а не N запросов к базе.
+    Публиковать можно из любого потока: события доставляются через call_soon_threadsafe.
+    Медленный подписчик не тормозит остальных: при переполнении его очередь
+    сбрасывается и в неё кладётся пометка resync — читатель перечитывает состояние сеанса из базы.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers: dict[int, set[SeatSubscriber]] = {}
+        self.lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, session_id: int) -> SeatSubscriber:
+        """Подписывает текущий цикл событий на изменения мест сеанса."""
+        subscriber = SeatSubscriber(asyncio.Queue(self.queue_size), asyncio.get_running_loop())
+        with self.lock:
+            self.subscribers.setdefault(session_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, session_id: int, subscriber: SeatSubscriber) -> None:
+        """Отписывает подписчика; пустые наборы подписчиков удаляются."""
+        with self.lock:
+            subscribers = self.subscribers.get(session_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[session_id]
+
+    def publish(self, session_id: int, seats: int, changes: dict[int, int] | None = None) -> None:
+        """
+        Публикует новое количество свободных мест и изменённые статусы мест сеанса.
+        Если на сеанс никто не подписан, ничего не делает.
+        """
+        self.broadcast(session_id, {"seats": seats, "changes": changes or {}})
+
+    def broadcast(self, session_id: int, event: dict) -> None:
+        """Раздаёт готовое событие всем подписчикам сеанса."""
+        with self.lock:
+            subscribers = tuple(self.subscribers.get(session_id, ()))
+        if not subscribers:
+            return
+        self.published += 1
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber.queue, event)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт
+                self.unsubscribe(session_id, subscriber)
+
+    def _deliver(self, queue: asyncio.Queue, event: dict) -> None:
+        """Кладёт событие в очередь подписчика; при переполнении заменяет очередь пометкой resync."""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+                self.dropped += 1
+            event = {"resync": True}
+        queue.put_nowait(event)
+
+    def session_ids(self) -> list[int]:
+        """Сеансы, на которые сейчас кто-то подписан."""
+        with self.lock:
+            return list(self.subscribers)
+
+    def stats(self) -> dict:
+        """Возвращает количество сеансов с подписчиками, подписчиков и событий."""
+        with self.lock:
+            sessions = len(self.subscribers)
+            subscribers = sum(len(s) for s in self.subscribers.values())
+        return {
+            "sessions": sessions,
+            "subscribers": subscribers,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+# Общий экземпляр на процесс
+seat_events = SeatEvents(SEAT_EVENTS_QUEUE_SIZE)
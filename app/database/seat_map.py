@@ -0,0 +1,57 @@
+# Схема зала хранится компактно: один байт на место в колонке movies.seat_map.
+# Статус любого места читается по индексу за O(1), без отдельной строки на каждое место.
+
+SEAT_FREE = 0      # место свободно
+SEAT_HELD = 1      # место временно удерживается до подтверждения
+SEAT_BOOKED = 2    # место забронировано
+
+BOOKING_HELD = "held"              # бронь удерживает место до подтверждения
+BOOKING_CONFIRMED = "confirmed"    # бронь подтверждена
+
+
+def new_seat_map(capacity: int) -> bytes:
+    """Создаёт схему зала на capacity мест, все места свободны."""
+    return bytes(capacity)
+
+
+def seat_status(seat_map: bytes, seat: int) -> int:
+    """Возвращает статус места по его номеру (с нуля)."""
+    return seat_map[seat]
+
+
+def set_seat(seat_map: bytes, seat: int, status: int) -> bytes:
+    """Возвращает новую схему зала, в которой у места seat установлен статус status."""
+    updated = bytearray(seat_map)
+    updated[seat] = status
+    return bytes(updated)
+
+
+def set_seats(seat_map: bytes, seats: list[int], status: int, expected: int | None = None) -> tuple[bytes, int]:
+    """
+    Устанавливает статус status местам, у которых сейчас статус expected (None — любой).
+    Возвращает новую схему и количество изменённых мест.
+    """
+    updated = bytearray(seat_map)
+    changed = 0
+    for seat in seats:
+        if 0 <= seat < len(updated) and (expected is None or updated[seat] == expected):
+            updated[seat] = status
+            changed += 1
+    return bytes(updated), changed
+
+
+def first_free_seat(seat_map: bytes) -> int | None:
+    """Возвращает номер первого свободного места или None, если свободных нет."""
+    index = seat_map.find(SEAT_FREE)
+    return index if index >= 0 else None
+
+
+def layout(seat_map: bytes, seats_per_row: int) -> list[list[tuple[int, int]]]:
+    """
+    Разбивает схему зала на ряды для отображения.
+    Каждое место — пара (номер места, статус).
+    """
+    return [
+        [(seat, seat_map[seat]) for seat in range(start, min(start + seats_per_row, len(seat_map)))]
+        for start in range(0, len(seat_map), seats_per_row)
+    ]
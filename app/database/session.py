@@ -1,11 +1,200 @@
-from sqlalchemy import create_engine
+import threading
+from collections import deque
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql.dml import UpdateBase
 
-SQL_DB_URL = "sqlite:///./database.db"
+from app.config import (
+    SQL_DB_URL, ASYNC_SQL_DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    SQLITE_TUNING, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE, SQLITE_SINGLE_WRITER, METRICS_ENABLED, SLOW_QUERY_LOG
+)
+from app.metrics import instrument_engine
+from app.database.query_log import enable_query_log
 
-engine = create_engine(SQL_DB_URL, connect_args={"check_same_thread": False})
-session_local = sessionmaker(autoflush=False, autocommit=False, bind=engine)
+# Асинхронные драйверы для синхронных URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Переводит синхронный URL базы данных на асинхронный драйвер.
+    Если для диалекта нет известного драйвера, URL возвращается без изменений.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Настраивает новое соединение SQLite: WAL-журнал (читатели не блокируются записью),
+    уровень synchronous, ожидание блокировки вместо ошибки "database is locked",
+    размер кэша страниц и отображение файла в память.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    """
+    Включает проверку внешних ключей SQLite (по умолчанию выключена):
+    без неё не работают ON DELETE CASCADE и защита от броней на несуществующий сеанс.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+is_sqlite = make_url(SQL_DB_URL).get_backend_name() == "sqlite"
+connect_args = {"check_same_thread": False} if is_sqlite else {}
+pool_options = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+}
+# Пул из одного соединения: записи выстраиваются в очередь внутри процесса, а не спорят за блокировку файла
+writer_pool_options = {**pool_options, "pool_size": 1, "max_overflow": 0}
+use_single_writer = is_sqlite and SQLITE_SINGLE_WRITER
+async_url = ASYNC_SQL_DB_URL or to_async_url(SQL_DB_URL)
+
+engine = create_engine(SQL_DB_URL, connect_args=connect_args, **pool_options)
+writer_engine = create_engine(SQL_DB_URL, connect_args=connect_args, **writer_pool_options) \
+    if use_single_writer else engine
+
+# Асинхронный движок для async-обработчиков: запросы не блокируют event loop
+async_engine = create_async_engine(async_url, **pool_options)
+async_writer_engine = create_async_engine(async_url, **writer_pool_options) \
+    if use_single_writer else async_engine
+
+# Внешние ключи включаются всегда, независимо от профиля производительности
+if is_sqlite:
+    for sync_engine in {engine, writer_engine, async_engine.sync_engine, async_writer_engine.sync_engine}:
+        event.listen(sync_engine, "connect", enable_sqlite_foreign_keys)
+
+if is_sqlite and SQLITE_TUNING:
+    for sync_engine in {engine, writer_engine, async_engine.sync_engine, async_writer_engine.sync_engine}:
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+
+# Подсчёт SQL-запросов и их времени для /metrics
+if METRICS_ENABLED:
+    for sync_engine in {engine, writer_engine, async_engine.sync_engine, async_writer_engine.sync_engine}:
+        instrument_engine(sync_engine)
+
+# Журнал медленных запросов с планами выполнения (по умолчанию выключен)
+if SLOW_QUERY_LOG:
+    for sync_engine in {engine, writer_engine, async_engine.sync_engine, async_writer_engine.sync_engine}:
+        enable_query_log(sync_engine)
+
+
+class WriterQueue:
+    """
+    Очередь потоков к соединению-писателю в порядке прихода.
+    Пул SQLAlchemy не гарантирует очерёдность: освободившееся соединение забирает поток,
+    пришедший только что, а разбуженный ожидающий встаёт в конец очереди снова.
+    Под постоянной нагрузкой на запись отдельные запросы так проигрывают раз за разом
+    и ждут в разы дольше остальных. Здесь писатель передаётся следующему в очереди напрямую.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.waiters: deque[threading.Event] = deque()
+        self.busy = False
+
+    def acquire(self) -> None:
+        """Ждёт своей очереди; через timeout секунд ожидания — TimeoutError, как у пула."""
+        with self.lock:
+            if not self.busy:
+                self.busy = True
+                return
+            turn = threading.Event()
+            self.waiters.append(turn)
+        if turn.wait(self.timeout):
+            return
+        with self.lock:
+            # Очередь могла дойти в момент таймаута
+            if turn.is_set():
+                return
+            self.waiters.remove(turn)
+        raise exc.TimeoutError(f"Writer queue limit reached, timed out after {self.timeout} s")
+
+    def release(self) -> None:
+        """Передаёт писателя следующему в очереди или освобождает его."""
+        with self.lock:
+            if self.waiters:
+                self.waiters.popleft().set()
+            else:
+                self.busy = False
+
+
+class RoutingSession(Session):
+    """
+    Сессия, которая отправляет запись (flush, INSERT/UPDATE/DELETE) в соединение-писатель,
+    а чтение — в общий пул.
+    После первой записи и до конца транзакции чтение тоже идёт через писателя:
+    транзакция видит свои изменения, а сессия, занявшая писателя, не ждёт соединение
+    из пула чтения. Иначе при исчерпанном пуле чтения сессии, ждущие писателя,
+    и писатель, ждущий чтения, блокируют друг друга до таймаута пула.
+    Транзакции занимают писателя по очереди прихода (WriterQueue) и освобождают в конце транзакции.
+    """
+    reader = engine
+    writer = writer_engine
+    writer_queue = WriterQueue(DB_POOL_TIMEOUT)
+    # Писатель уже используется в текущей транзакции (сбрасывается в конце транзакции)
+    uses_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.uses_writer or self._flushing or isinstance(clause, UpdateBase):
+            if not self.uses_writer and self.writer_queue is not None:
+                self.writer_queue.acquire()
+            self.uses_writer = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    """После внешней транзакции писатель переходит к следующему в очереди, а сессия снова читает из общего пула."""
+    if transaction.parent is None:
+        if session.uses_writer and session.writer_queue is not None:
+            session.writer_queue.release()
+        session.uses_writer = False
+
+
+class AsyncRoutingSession(RoutingSession):
+    """
+    Маршрутизация чтения и записи для AsyncSession.
+    Без WriterQueue: все асинхронные сессии работают в потоке event loop, и блокирующее
+    ожидание очереди остановило бы сессию, которая держит писателя.
+    """
+    reader = async_engine.sync_engine
+    writer = async_writer_engine.sync_engine
+    writer_queue = None
+
+
+if use_single_writer:
+    session_local = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False)
+    async_session_local = async_sessionmaker(
+        sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    session_local = sessionmaker(autoflush=False, autocommit=False, bind=engine)
+    async_session_local = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -20,3 +209,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Асинхронный генератор для предоставления AsyncSession.
+    Закрывает сессию и возвращает соединение в пул после использования.
+    """
+    async with async_session_local() as db:
+        yield db
@@ -1,13 +1,37 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
 from colorama import init, Fore, Style
 
-# Инициализация colorama для корректного отображения цветов в терминале
-init(autoreset=True)
+from app.config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT
 
 
 class ColorFormatter(logging.Formatter):
+    def __init__(self, *args, color: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.color = color
+
+    def formatMessage(self, record):
+        msg = super().formatMessage(record)
+        # Сколько сообщений перед этим было отброшено ограничением частоты
+        if getattr(record, "suppressed", 0):
+            msg += f" (пропущено сообщений: {record.suppressed})"
+        return msg
+
     def format(self, record):
         msg = super().format(record)
+        # Без терминала (файл, journald, docker) — без цвета
+        if not self.color:
+            return msg
         # Ошибки и критические — красным
         if record.levelno >= logging.ERROR:
             return Fore.RED + msg + Style.RESET_ALL
@@ -18,17 +42,188 @@ class ColorFormatter(logging.Formatter):
         return msg
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    Одна строка JSON на запись: время, уровень, сообщение и контекст запроса
+    (request_id, user_id, session_id, latency_ms), если запись сделана внутри запроса.
+    """
+    context_fields = ("request_id", "user_id", "session_id", "latency_ms", "suppressed")
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for name in self.context_fields:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+@dataclass(slots=True)
+class LogContext:
+    """Контекст текущего HTTP-запроса для записей лога."""
+    request_id: str
+    started: float = field(default_factory=time.perf_counter)
+    user_id: int | None = None
+    scope: dict | None = None
+
+
+# Контекст текущего запроса; объект общий для потоков пула, поэтому user_id виден во всём запросе
+log_context: ContextVar[LogContext | None] = ContextVar("log_context", default=None)
+
+
+def bind_log_user(user_id: int) -> None:
+    """Запоминает id пользователя в контексте логов текущего запроса."""
+    context = log_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи поля контекста запроса. Работает в потоке, который пишет лог:
+    в потоке фоновой записи ContextVar уже недоступен.
+    """
+
+    def filter(self, record):
+        context = log_context.get()
+        if context is None:
+            return True
+        record.request_id = context.request_id
+        record.user_id = context.user_id
+        record.latency_ms = round((time.perf_counter() - context.started) * 1000, 2)
+        # Параметры пути появляются в scope после сопоставления маршрута
+        path_params = context.scope.get("path_params", {}) if context.scope else {}
+        session_id = path_params.get("session_id")
+        record.session_id = int(session_id) if str(session_id).isdigit() else session_id
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничение частоты записей (token bucket): не больше rate сообщений в секунду
+    с запасом в секунду (не меньше одного сообщения). Ошибки проходят всегда;
+    число отброшенных сообщений добавляется к следующей прошедшей записи (поле suppressed).
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(rate, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1 and record.levelno < logging.ERROR:
+                self.suppressed += 1
+                return False
+            self.tokens = max(self.tokens - 1, 0)
+            if self.suppressed:
+                record.suppressed, self.suppressed = self.suppressed, 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь фоновой записи и сразу возвращается.
+    Если очередь переполнена (вывод не успевает), запись отбрасывается, а не блокирует запрос.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Сообщение и трассировка собираются здесь, пока аргументы и исключение ещё живы;
+        # форматирование целиком (цвет или JSON) — уже в фоновом потоке
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestContextMiddleware:
+    """
+    ASGI-middleware: создаёт контекст логов для каждого запроса.
+    request_id берётся из заголовка X-Request-ID или генерируется и возвращается в ответе.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        token = log_context.set(LogContext(request_id=request_id, scope=scope))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            log_context.reset(token)
+
+
 # Создаем логгер с именем твоего проекта
 logger = logging.getLogger('ip_tracker_bot')
-logger.setLevel(logging.DEBUG)  # можно поставить INFO, если не нужны debug сообщения
+logger.setLevel(LOG_LEVEL)
 
-# Формат: дата, время, уровень лога, сообщение
-formatter = ColorFormatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+# Цвет только для терминала; colorama нужна лишь в этом случае (на Windows)
+use_color = sys.stderr.isatty()
+if use_color:
+    init(autoreset=True)
 
-# Обработчик вывода логов в консоль
+# Формат: дата, время, уровень лога, сообщение (или JSON по LOG_FORMAT)
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S%z')
+else:
+    formatter = ColorFormatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S', color=use_color)
+
+# Обработчик вывода логов в консоль — работает в фоновом потоке QueueListener
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
 
+# Обработчики запросов только кладут запись в очередь: запись в stdout/stderr не блокирует event loop
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT))
+queue_handler.addFilter(ContextFilter())
+log_listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+
 # Добавляем обработчик в логгер, если он еще не добавлен
 if not logger.hasHandlers():
-    logger.addHandler(console_handler)
+    logger.addHandler(queue_handler)
+    log_listener.start()
+    # При выходе дописываем всё, что осталось в очереди
+    atexit.register(log_listener.stop)
@@ -1,20 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from uvicorn import run
 
-from app.routers import admin_router, home_router, user_router, session_routers, book_routers
+from app.config import METRICS_ENABLED, WORKERS, COHERENCE_ENABLED
+from app.routers import admin_router, home_router, user_router, session_routers, book_routers, api_router, \
+    metrics_router
 from app.utils.exception_handlers import register_exception_handlers
-from app.database.session import engine
+from app.utils.seat_sweeper import run_seat_sweeper
+from app.utils.templates import precompile_templates
+from app.metrics import MetricsMiddleware
+from app.database.session import engine, async_engine, async_writer_engine
+from app.database.coherence import coherence
+from app.database.schedule_cache import schedule_cache
 from app.database import models
-from app.logger import logger
+from app.database.migrations import upgrade_schema
+from app.logger import logger, RequestContextMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения.
+    При старте предкомпилирует шаблоны и запускает фоновую очистку просроченных удержаний мест,
+    а при нескольких воркерах — опрос изменений из других процессов;
+    при остановке отменяет фоновые задачи и закрывает соединения пулов асинхронных движков.
+    """
+    precompile_templates()
+    tasks = [asyncio.create_task(run_seat_sweeper())]
+    if COHERENCE_ENABLED:
+        tasks.append(asyncio.create_task(coherence.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    coherence.close()
+    await async_engine.dispose()
+    await async_writer_engine.dispose()
+
 
 app = FastAPI(
     title="CinemaFlow",
     description="CinemaFlow is a cinema management system with admin panel.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Создаём таблицы в базе данных (если их ещё нет)
+# Создаём таблицы в базе данных (если их ещё нет) и доводим до текущей схемы базу прежней версии
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Изменения сеансов из других воркеров сбрасывают кэш расписания
+coherence.on_change("schedule", schedule_cache.invalidate)
 
 # Регистрируем ошибки 404 и тд
 register_exception_handlers(app)
@@ -23,7 +61,18 @@ app.include_router(home_router.router, tags=["Home"])
 app.include_router(user_router.router, prefix="/user", tags=["User"])
 app.include_router(session_routers.router, prefix="/session", tags=["Session"])
 app.include_router(book_routers.router, prefix="/book", tags=["Book"])
+app.include_router(api_router.router, prefix="/api/v1", tags=["API"])
+
+# Метрики Prometheus: замеры запросов и эндпоинт /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router.router)
+
+# Контекст логов (request_id, пользователь, сеанс, время от начала запроса) для каждого запроса
+app.add_middleware(RequestContextMiddleware)
 
+# Несколько воркеров: WORKERS=4 python main.py или
+# gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w 4
 if __name__ == '__main__':
     logger.info("Запуск CinemaFlow")
-    run('main:app', host='127.0.0.1', port=8000)
+    run('main:app', host='127.0.0.1', port=8000, workers=WORKERS)
@@ -0,0 +1,237 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Метрики в текстовом формате Prometheus без внешних зависимостей.
+# Каждая метрика — словарь «набор значений меток -> значение» под общим замком;
+# обновление стоит одного захвата замка, поэтому сбор можно держать включённым в продакшене.
+
+# Границы корзин гистограмм длительности (секунды) и количества запросов к БД
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+_registry: list["Metric"] = []
+_collectors: list = []
+
+
+def _escape(value) -> str:
+    """Экранирует значение метки для текстового формата."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metric:
+    """Базовый класс метрики: имя, описание, имена меток. Регистрируется при создании."""
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Текущее значение, которое может расти и уменьшаться."""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with _lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами: счётчики по корзинам, сумма и количество."""
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+        # Набор меток -> [счётчики корзин..., +Inf, сумма]
+        self.series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def register_collector(collect) -> None:
+    """
+    Регистрирует функцию, которая при каждом запросе /metrics возвращает
+    словарь {имя_метрики: значение} — для состояния, которое уже считается в других модулях
+    (кэши, пул хеширования, очередь допуска).
+    """
+    _collectors.append(collect)
+
+
+def render_metrics() -> str:
+    """Собирает все метрики в текстовом формате Prometheus."""
+    with _lock:
+        lines = [line for metric in _registry for line in metric.render()]
+    for collect in _collectors:
+        for name, value in collect().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_requests = Counter("cinemaflow_http_requests_total", "HTTP requests", ("method", "route", "status"))
+http_latency = Histogram("cinemaflow_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_in_flight = Gauge("cinemaflow_http_requests_in_flight", "HTTP requests being processed")
+
+# База данных
+db_queries = Counter("cinemaflow_db_queries_total", "SQL statements executed")
+db_query_seconds = Counter("cinemaflow_db_query_seconds_total", "Time spent executing SQL statements")
+db_queries_per_request = Histogram(
+    "cinemaflow_db_queries_per_request", "SQL statements per HTTP request", ("route",), buckets=COUNT_BUCKETS
+)
+db_seconds_per_request = Histogram("cinemaflow_db_seconds_per_request", "SQL time per HTTP request", ("route",))
+
+# Бизнес-события
+bookings = Counter("cinemaflow_bookings_total", "Booking state changes", ("action",))
+booking_failures = Counter("cinemaflow_booking_failures_total", "Failed booking attempts", ("reason",))
+jwt_verifications = Counter("cinemaflow_jwt_verifications_total", "JWT verifications", ("result",))
+password_hashes = Counter("cinemaflow_password_hashes_total", "Argon2 operations", ("operation",))
+password_hash_seconds = Histogram(
+    "cinemaflow_password_hash_seconds", "Argon2 operation time in the pool", ("operation",)
+)
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """Счётчики SQL текущего HTTP-запроса."""
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Статистика текущего запроса; контекст копируется в пул потоков и в run_sync, объект общий
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    db_queries.inc()
+    db_query_seconds.inc(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context):
+    # Запрос упал: after_cursor_execute не будет, убираем его отметку времени
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает подсчёт запросов и их времени к синхронному движку (или sync_engine асинхронного)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время ответа по шаблону маршрута, статус, число запросов в обработке
+    и количество/время SQL на запрос. Шаблон маршрута (/session/{session_id}) вместо пути
+    не даёт меткам разрастаться. Запросы к самому /metrics не учитываются.
+    """
+
+    def __init__(self, app, skip_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            request_stats.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests.inc(method=method, route=route, status=status)
+            http_latency.observe(elapsed, method=method, route=route)
+            db_queries_per_request.observe(stats.queries, route=route)
+            db_seconds_per_request.observe(stats.db_seconds, route=route)
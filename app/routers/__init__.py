@@ -2,4 +2,6 @@ from app.routers import admin_router
 from app.routers import book_routers
 from app.routers import session_routers
 from app.routers import user_router
-from app.routers import home_router
\ No newline at end of file
+from app.routers import home_router
+from app.routers import api_router
+from app.routers import metrics_router
\ No newline at end of file
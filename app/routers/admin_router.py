@@ -1,21 +1,31 @@
-from fastapi import Request, Form, APIRouter, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+import io
+from fastapi import Request, Form, APIRouter, Depends, Query, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response
+from starlette.datastructures import URL
 from sqlalchemy.orm import Session
-from typing import Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Literal
 from datetime import datetime
 
-from app.config import ADMINS
+from app.config import (
+    ADMINS, SESSIONS_PAGE_SIZE, SESSIONS_PAGE_SIZE_MAX, DEFAULT_SEATS_PER_ROW, SLOW_QUERY_LOG, SESSION_MAX_DURATION
+)
 from app.utils.token import create_token, verify_token
-from app.database.session import get_db
-from app.database.cruds import movies_crud
+from app.utils.token_cache import token_cache
+from app.database.session import get_db, get_async_db
+from app.database.cruds import movies_crud, async_movies_crud
+from app.database.cruds.movies_crud import HallConflictError
+from app.database.query_log import query_log
 from app.utils.check_valid import check_token
-from app.utils.security import verify_password
-from app.utils.schemas import MovieSessionFull
+from app.utils.security import verify_password_async, PasswordPoolBusy
+from app.routers.dependencies import session_filters
+from app.utils.schemas import MovieSessionFull, SessionFilters
+from app.utils.session_import import import_sessions_file, detect_format
+from app.utils.data_export import export_stream, export_filename, EXPORT_MEDIA_TYPES
 from app.logger import logger
+from app.utils.templates import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/login", response_class=HTMLResponse)
@@ -35,9 +45,14 @@ async def login_admin_post(
     """
     Обрабатывает вход администратора.
     Проверяет username и пароль, создает токен и устанавливает его в cookie.
-    При неверных данных возвращает 401 Unauthorized.
+    При неверных данных возвращает 401 Unauthorized, при перегрузке пула хеширования — 503.
     """
-    if username in ADMINS and verify_password(password, ADMINS[username]):
+    try:
+        is_valid = username in ADMINS and await verify_password_async(password, ADMINS[username])
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts, try again later")
+
+    if is_valid:
         token = create_token(username, mode=True)
         response = RedirectResponse(url="/admin/panel", status_code=303)
         response.set_cookie(key="access_token_admin", value=token, httponly=True)
@@ -49,10 +64,17 @@ from fastapi import HTTPException
 
 
 @router.get("/panel")
-async def panel_admin_get(request: Request, db: Session = Depends(get_db)):
+async def panel_admin_get(
+        request: Request,
+        cursor: str | None = None,
+        limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_SIZE_MAX),
+        filters: SessionFilters = Depends(session_filters),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
-    Отображает панель администратора со всеми сеансами.
-    Проверяет токен администратора и получает данные из базы.
+    Отображает панель администратора с сеансами.
+    Проверяет токен администратора и получает данные из базы постранично
+    (keyset-пагинация по курсору) с фильтрами по кинотеатру, залу, фильму и датам.
     Использует шаблон 'admin_panel.html'.
     """
     # Проверяем токен и получаем username
@@ -60,18 +82,66 @@ async def panel_admin_get(request: Request, db: Session = Depends(get_db)):
     if isinstance(username_or_redirect, RedirectResponse):
         return username_or_redirect
 
-    sessions = movies_crud.get_sessions(db)
-
     logger.info("Админ вошел в систему")
 
-    return templates.TemplateResponse("admin_panel.html", {"request": request, "sessions": sessions})
+    return await _render_panel(request, db, request.url, cursor, limit, filters)
+
+
+async def _render_panel(
+        request: Request,
+        db: AsyncSession,
+        url: URL,
+        cursor: str | None,
+        limit: int,
+        filters: SessionFilters,
+        form: dict | None = None,
+        conflict: HallConflictError | None = None,
+        status_code: int = 200
+) -> HTMLResponse:
+    """
+    Рендерит панель администратора: страницу сеансов после cursor и ссылки на соседние страницы
+    (относительно url панели). form — введённые значения формы нового сеанса,
+    conflict — пересечение в зале, из-за которого сеанс не добавлен.
+    """
+    try:
+        after = movies_crud.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    sessions, next_key = await async_movies_crud.get_sessions_page(db, filters, after, limit)
+
+    next_url = None
+    if next_key:
+        next_url = str(url.include_query_params(cursor=movies_crud.encode_cursor(next_key)))
+    # Первая страница — те же фильтры без курсора
+    first_url = str(url.remove_query_params("cursor")) if cursor else None
+
+    return templates.TemplateResponse(
+        "admin_panel.html",
+        {
+            "request": request,
+            "sessions": sessions,
+            "filters": filters,
+            "next_url": next_url,
+            "first_url": first_url,
+            "form": form or {},
+            "conflict": conflict,
+            # Самые медленные запросы, если включён журнал медленных запросов
+            "slow_queries": query_log.top() if SLOW_QUERY_LOG else None
+        },
+        status_code=status_code
+    )
 
 
 @router.get("/logout", response_class=RedirectResponse)
-async def logout_admin_get() -> RedirectResponse:
+async def logout_admin_get(request: Request) -> RedirectResponse:
     """
-    Выход администратора: удаляет токен из cookie и редиректит на главную.
+    Выход администратора: удаляет токен из cookie и кэша токенов, редиректит на главную.
     """
+    token = request.cookies.get("access_token_admin")
+    if token:
+        token_cache.invalidate(token)
+
     response = RedirectResponse(url="/")
     response.delete_cookie("access_token_admin")
     return response
@@ -86,14 +156,17 @@ async def add_session_post(
         time: str = Form(...),
         hall: str = Form(...),
         seats: int = Form(...),
-        duration: int = Form(...),
+        duration: int = Form(..., gt=0, le=SESSION_MAX_DURATION),
+        seats_per_row: int = Form(DEFAULT_SEATS_PER_ROW),
         description: str = Form(None),
-        db: Session = Depends(get_db)
-) -> RedirectResponse:
+        db: AsyncSession = Depends(get_async_db)
+) -> Response:
     """
     Добавляет новый сеанс фильма.
     Проверяет токен администратора, парсит дату и время,
     создает объект MovieSessionFull и сохраняет его в базе.
+    Если зал в это время занят, заново показывает панель (409) с заполненной формой,
+    пересекающимися сеансами и ближайшим свободным временем.
     После добавления редиректит на панель администратора.
     """
     # Проверяем токен
@@ -113,11 +186,23 @@ async def add_session_post(
         hall=hall,
         seats=seats,
         duration=duration,
+        seats_per_row=seats_per_row,
         description=description
     )
 
     # Сохраняем в БД
-    movies_crud.create_session(db, session)
+    try:
+        await async_movies_crud.create_session(db, session)
+    except HallConflictError as e:
+        logger.info(f"Зал занят: {cinema} / {hall} в {dt}")
+        form = {
+            "movie": movie, "cinema": cinema, "date": date, "time": time, "hall": hall, "seats": seats,
+            "duration": duration, "seats_per_row": seats_per_row, "description": description
+        }
+        return await _render_panel(
+            request, db, URL("/admin/panel"), None, SESSIONS_PAGE_SIZE, SessionFilters(),
+            form=form, conflict=e, status_code=409
+        )
 
     # Редирект обратно на панель
     response = RedirectResponse(url="/admin/panel", status_code=303)
@@ -126,12 +211,46 @@ async def add_session_post(
     return response
 
 
+@router.get("/free-slot")
+async def free_slot_get(
+        request: Request,
+        cinema: str,
+        hall: str,
+        start: datetime,
+        duration: int = Query(..., gt=0, le=SESSION_MAX_DURATION),
+        db: AsyncSession = Depends(get_async_db)
+) -> JSONResponse:
+    """
+    Проверяет, свободен ли зал на duration минут начиная со start.
+    Возвращает пересекающиеся сеансы и ближайшее время не раньше start, когда зал свободен.
+    Проверяет токен администратора.
+    """
+    # Проверяем токен администратора
+    token = request.cookies.get("access_token_admin")
+    if not token:
+        raise HTTPException(status_code=401, detail="No token found")
+    verify_token(token, mode=True)
+
+    conflicts = await async_movies_crud.find_hall_conflicts(db, cinema, hall, start, duration)
+    next_free = await async_movies_crud.find_next_free_slot(db, cinema, hall, start, duration) if conflicts else start
+    return JSONResponse({
+        "free": not conflicts,
+        "conflicts": movies_crud.conflicts_as_dicts(conflicts),
+        "next_free_slot": next_free.isoformat(),
+    })
+
+
 @router.post("/delete-session/{session_id}")
-async def delete_session_post(session_id: int, request: Request, db: Session = Depends(get_db)) -> RedirectResponse:
+async def delete_session_post(
+        session_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db)
+) -> RedirectResponse:
     """
-    Удаляет сеанс по ID.
-    Проверяет токен администратора, ищет сеанс в базе и удаляет его через CRUD.
+    Удаляет сеанс по ID вместе с его бронями.
+    Проверяет токен администратора и удаляет сеанс через CRUD.
     Если сеанс не найден или удаление невозможно, возвращает соответствующую ошибку.
+    Число пользователей, чьи брони отменены, записывается в лог.
     После удаления редиректит на панель администратора.
     """
     # Проверяем токен администратора
@@ -141,14 +260,92 @@ async def delete_session_post(session_id: int, request: Request, db: Session = D
     verify_token(token, mode=True)
 
     # Удаляем сеанс через CRUD
-    session_to_delete = movies_crud.get_session_by_id(db, session_id)
-    if not session_to_delete:
-        raise HTTPException(status_code=404, detail="Session not found")
-
     try:
-        movies_crud.delete_session(db, session_id)
+        deleted = await async_movies_crud.delete_session(db, session_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Session not deleted")
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Session not found")
 
     logger.info("Админ удалил сеанс")
+    if deleted.user_ids:
+        logger.info(
+            f"Брони сеанса {deleted.movie} ({deleted.cinema}, {deleted.time:%Y-%m-%d %H:%M}) "
+            f"отменены у {len(deleted.user_ids)} пользователей"
+        )
+    return RedirectResponse(url="/admin/panel", status_code=303)
+
+
+@router.post("/import-sessions")
+def import_sessions_post(
+        request: Request,
+        file: UploadFile = File(..., description="CSV or JSON (array / JSON Lines) file with sessions"),
+        db: Session = Depends(get_db)
+) -> JSONResponse:
+    """
+    Массовый импорт сеансов из CSV или JSON-файла.
+    Проверяет токен администратора, читает файл потоково и вставляет сеансы пачками,
+    по одной транзакции на пачку. Возвращает отчёт с количеством созданных строк
+    и ошибками по номерам строк. Если файл не дочитан до конца, отчёт об уже импортированных
+    строках возвращается с кодом 400 и причиной в поле error.
+    """
+    # Проверяем токен администратора
+    token = request.cookies.get("access_token_admin")
+    if not token:
+        raise HTTPException(status_code=401, detail="No token found")
+    verify_token(token, mode=True)
+
+    try:
+        file_format = detect_format(file.filename)
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        report = import_sessions_file(db, stream, file_format)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="File could not be parsed")
+
+    logger.info(f"Админ импортировал сеансы: {report.created} из {report.total}")
+    return JSONResponse(report.as_dict(), status_code=400 if report.error else 200)
+
+
+@router.post("/slow-queries/reset")
+def reset_slow_queries_post(request: Request) -> RedirectResponse:
+    """
+    Очищает таблицу самых медленных запросов и возвращает в панель.
+    Проверяет токен администратора.
+    """
+    # Проверяем токен администратора
+    token = request.cookies.get("access_token_admin")
+    if not token:
+        raise HTTPException(status_code=401, detail="No token found")
+    verify_token(token, mode=True)
+
+    query_log.reset()
+    logger.info("Админ очистил таблицу медленных запросов")
     return RedirectResponse(url="/admin/panel", status_code=303)
+
+
+@router.get("/export/{kind}")
+def export_get(
+        request: Request,
+        kind: Literal["sessions", "bookings"],
+        file_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+        gzip: bool = False
+) -> StreamingResponse:
+    """
+    Выгрузка всех сеансов или броней (с пользователем и сеансом) в CSV или NDJSON.
+    Проверяет токен администратора. Строки читаются из базы пачками и сразу отправляются клиенту,
+    поэтому память не зависит от размера таблиц; gzip=true сжимает поток на лету.
+    """
+    # Проверяем токен администратора
+    token = request.cookies.get("access_token_admin")
+    if not token:
+        raise HTTPException(status_code=401, detail="No token found")
+    verify_token(token, mode=True)
+
+    filename = export_filename(kind, file_format, gzip)
+    media_type = "application/gzip" if gzip else EXPORT_MEDIA_TYPES[file_format]
+    logger.info(f"Админ выгружает {kind} в {filename}")
+    return StreamingResponse(
+        export_stream(kind, file_format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Request, Response, Depends, Query, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.config import SESSIONS_PAGE_SIZE, SESSIONS_PAGE_SIZE_MAX
+from app.database.session import get_db
+from app.database.schedule_cache import schedule_cache, ScheduleItem
+from app.database.cruds import movies_crud, booking_crud
+from app.database.cruds.booking_crud import BookingRow
+from app.utils.check_valid import check_user
+from app.utils.http_cache import make_etag, is_not_modified, cache_headers, not_modified
+from app.utils.json_response import FastJSONResponse, StreamingJSONResponse, json_adapter, dump_json
+from app.routers.dependencies import session_filters
+from app.utils.schemas import SessionFilters, SessionPageOut, SessionItemOut, MovieSessionOut, BookingOut
+from app.utils.token import verify_token
+
+# Ответы API сериализуются сразу в байты (см. utils/json_response.py)
+router = APIRouter(default_response_class=FastJSONResponse)
+
+
+def _api_user_id(request: Request, db: Session) -> int:
+    """
+    Проверяет пользователя для API: токен из cookie access_token_user
+    или из заголовка Authorization: Bearer. Ошибки — 401 в JSON, без редиректов.
+    """
+    token = request.cookies.get("access_token_user")
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    username = verify_token(token, mode=False)
+    user = check_user(db, username, request)
+    if isinstance(user, RedirectResponse):
+        raise HTTPException(status_code=401, detail="User not found")
+    return user.id
+
+
+@router.get("/sessions", response_model=SessionPageOut)
+def list_sessions(
+        request: Request,
+        cursor: str | None = None,
+        limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_SIZE_MAX),
+        filters: SessionFilters = Depends(session_filters),
+        db: Session = Depends(get_db)
+):
+    """
+    Расписание предстоящих сеансов постранично (keyset-пагинация) с фильтрами, как на главной.
+    ETag строится из общей для воркеров версии расписания и параметров запроса, Last-Modified — время
+    изменения расписания. Если расписание не менялось, отвечает 304 без чтения страницы.
+    """
+    version, modified_at = schedule_cache.get_version(db)
+    etag = make_etag("sessions", *version, request.url.query)
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(etag, modified_at)
+
+    try:
+        after = movies_crud.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if filters.is_empty():
+        sessions, next_key = schedule_cache.get_page(db, after, limit)
+    else:
+        sessions, next_key = movies_crud.get_schedule_page(db, filters, after, limit)
+
+    # Строки расписания уже содержат ровно поля SessionItemOut и сериализуются без пересборки в модели
+    page = {"items": sessions, "next_cursor": movies_crud.encode_cursor(next_key) if next_key else None}
+    return FastJSONResponse(page, headers=cache_headers(etag, modified_at))
+
+
+@router.get("/schedule", response_model=list[SessionItemOut])
+def full_schedule(request: Request, db: Session = Depends(get_db)):
+    """
+    Всё предстоящее расписание одним ответом — для киосков и офлайн-клиентов.
+    Отдаётся потоково, пачками, из кэша расписания; ETag и Last-Modified — как у /sessions.
+    """
+    version, modified_at = schedule_cache.get_version(db)
+    etag = make_etag("schedule", *version)
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(etag, modified_at)
+
+    items = schedule_cache.get_upcoming(db)
+    return StreamingJSONResponse(items, ScheduleItem, headers=cache_headers(etag, modified_at))
+
+
+@router.get("/search", response_model=list[SessionItemOut])
+def search_sessions(
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_SIZE_MAX),
+        filters: SessionFilters = Depends(session_filters),
+        db: Session = Depends(get_db)
+):
+    """
+    Полнотекстовый поиск предстоящих сеансов: слова запроса ищутся как префиксы
+    в названии, описании и кинотеатре, результаты — по убыванию релевантности.
+    Фильтры — как у /sessions.
+    """
+    return FastJSONResponse(movies_crud.search_sessions(db, q, filters, limit))
+
+
+@router.get("/sessions/{session_id}", response_model=MovieSessionOut)
+def get_session(request: Request, session_id: int, db: Session = Depends(get_db)):
+    """
+    Полная информация о сеансе, включая количество свободных мест.
+    ETag — версия мест сеанса (seat_version): её проверка стоит одного чтения по первичному ключу,
+    и при совпадении сеанс целиком не загружается.
+    """
+    seat_version = movies_crud.get_session_version(db, session_id)
+    if seat_version is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    etag = make_etag("session", session_id, seat_version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    session = movies_crud.get_session_by_id(db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    data = MovieSessionOut.model_validate(session)
+    # Версию берём из прочитанной строки, чтобы ETag точно соответствовал телу
+    etag = make_etag("session", session_id, session.seat_version)
+    return FastJSONResponse(data, headers=cache_headers(etag))
+
+
+@router.get("/me/bookings", response_model=list[BookingOut])
+def my_bookings(request: Request, db: Session = Depends(get_db)):
+    """
+    Будущие брони текущего пользователя.
+    Ответ персональный, поэтому ETag — хеш тела, а кэшировать его можно только клиенту (private).
+    """
+    user_id = _api_user_id(request, db)
+    bookings = booking_crud.get_future_bookings_by_user(db, user_id)
+    body = dump_json(bookings, json_adapter(list[BookingRow]))
+
+    etag = make_etag("bookings", user_id, body)
+    if is_not_modified(request, etag):
+        return not_modified(etag, cache_control="private, no-cache")
+    return Response(body, media_type="application/json", headers=cache_headers(etag, cache_control="private, no-cache"))
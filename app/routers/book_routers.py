@@ -1,25 +1,30 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.session import get_db
-from app.database.cruds import movies_crud, booking_crud
-from app.utils.check_valid import check_token, check_user
+from app.database.session import get_async_db
+from app.database.cruds import async_movies_crud, async_booking_crud
+from app.utils.check_valid import check_token, check_user_async
+from app.utils.admission import admission
 from app.logger import logger
 router = APIRouter()
 
 
-@router.get("/{session_id}")
+@router.get("/{session_id}", dependencies=[Depends(admission)])
 async def book_session(
         request: Request,
         session_id: int,
-        db: Session = Depends(get_db)
+        seat: int | None = None,
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Создаёт бронь пользователя на указанный сеанс.
+    Удерживает место пользователя на указанном сеансе (первая фаза брони).
+    Если место не указано, удерживается первое свободное.
+    Перед обработчиком стоит очередь допуска: при наплыве запрос получает страницу ожидания
+    ещё до обращения к базе.
     Проверяет токен и существование пользователя.
     Если сеанс не найден — возвращает 404, при ошибке брони — 400.
-    После успешного бронирования редиректит на страницу профиля.
+    После удержания редиректит на страницу брони, где её нужно подтвердить.
     """
     # Проверяем токен и получаем username
     username_or_redirect = check_token(request, mode=False)
@@ -28,29 +33,57 @@ async def book_session(
     username = username_or_redirect
 
     # Проверяем пользователя
-    user_or_redirect = check_user(db, username)
+    user_or_redirect = await check_user_async(db, username, request)
     if isinstance(user_or_redirect, RedirectResponse):
         return user_or_redirect
     user = user_or_redirect
 
     # Проверяем, существует ли сеанс
-    session = movies_crud.get_session_by_id(db, session_id)
+    session = await async_movies_crud.get_session_by_id(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Пытаемся забронировать место
+    # Пытаемся удержать место
     try:
-        booking = booking_crud.create_booking(db, user_id=user.id, movie_id=session_id)
+        booking = await async_booking_crud.hold_seat(db, user_id=user.id, movie_id=session_id, seat=seat)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Редирект на страницу с деталями брони по booking_id для подтверждения
+    logger.info("Пользователь удержал место")
+    return RedirectResponse(url=f"/user/profile/session/{booking.id}", status_code=303)
+
+
+@router.get("/confirm/{booking_id}")
+async def confirm_booking(request: Request, booking_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Подтверждает удержание места (вторая фаза брони).
+    Проверяет токен и пользователя; просроченное или чужое удержание — 400.
+    После подтверждения редиректит на страницу профиля.
+    """
+    # Проверяем токен и получаем username
+    username_or_redirect = check_token(request, mode=False)
+    if isinstance(username_or_redirect, RedirectResponse):
+        return username_or_redirect
+    username = username_or_redirect
+
+    # Проверяем пользователя
+    user_or_redirect = await check_user_async(db, username, request)
+    if isinstance(user_or_redirect, RedirectResponse):
+        return user_or_redirect
+    user = user_or_redirect
+
+    try:
+        await async_booking_crud.confirm_booking(db, booking_id=booking_id, user_id=user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # Редирект на страницу с деталями брони по booking_id
     logger.info("Пользователь забронировал место")
-    return RedirectResponse(url=f"/user/profile", status_code=303)
+    return RedirectResponse(url="/user/profile", status_code=303)
 
 
 @router.get("/cancel/{booking_id}")
-async def delete_booking(request: Request, booking_id: int, db: Session = Depends(get_db)):
+async def delete_booking(request: Request, booking_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Отменяет бронь пользователя по ID.
     Проверяет токен пользователя, пытается удалить бронь из базы.
@@ -63,7 +96,7 @@ async def delete_booking(request: Request, booking_id: int, db: Session = Depend
 
     # Пытаемся удалить бронь по booking_id
     try:
-        booking_crud.delete_booking(db, booking_id)
+        await async_booking_crud.delete_booking(db, booking_id)
     except ValueError:
         # Можно здесь логировать ошибку или игнорировать, если бронь не найдена
         pass
@@ -0,0 +1,21 @@
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.utils.schemas import SessionFilters
+
+
+def session_filters(
+        cinema: str | None = None,
+        hall: str | None = None,
+        movie: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None
+) -> SessionFilters:
+    """
+    Зависимость FastAPI: собирает фильтры списка сеансов из query-параметров.
+    Проверку значений выполняет схема SessionFilters; при некорректной дате возвращает 400.
+    """
+    try:
+        return SessionFilters(cinema=cinema, hall=hall, movie=movie, date_from=date_from, date_to=date_to)
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid filter value")
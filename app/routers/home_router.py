@@ -1,23 +1,33 @@
-from fastapi import Request, APIRouter, Depends
+from fastapi import Request, APIRouter, Depends, Query, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
+from app.config import SESSIONS_PAGE_SIZE, SESSIONS_PAGE_SIZE_MAX
 from app.database.session import get_db
+from app.database.schedule_cache import schedule_cache
 from app.database.cruds import movies_crud
+from app.routers.dependencies import session_filters
+from app.utils.schemas import SessionFilters
 from app.utils.token import verify_token
+from app.utils.templates import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/", response_class=HTMLResponse)
-def home_get(request: Request, db: Session = Depends(get_db)):
+def home_get(
+        request: Request,
+        cursor: str | None = None,
+        limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_SIZE_MAX),
+        filters: SessionFilters = Depends(session_filters),
+        db: Session = Depends(get_db)
+):
     """
     Отображает главную страницу пользователя с предстоящими сеансами фильмов.
     Проверяет наличие и валидность токена пользователя в cookie.
     Если токен отсутствует или недействителен, делает редирект на страницу входа.
-    Получает все сеансы с базовыми данными и передает их в шаблон 'home.html'.
+    Сеансы выводятся постранично (keyset-пагинация по курсору) с фильтрами
+    по кинотеатру, залу, фильму и датам. Без фильтров страница берётся из кэша расписания.
     """
     # Проверяем токен пользователя
     token = request.cookies.get("access_token_user")
@@ -29,17 +39,74 @@ def home_get(request: Request, db: Session = Depends(get_db)):
     except Exception:
         return RedirectResponse(url="/user/login")
 
-    sessions_full = movies_crud.get_sessions(db, mode=True)
+    try:
+        after = movies_crud.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if filters.is_empty():
+        # Кэш уже хранит только базовые поля и обновляется при изменении расписания
+        sessions, next_key = schedule_cache.get_page(db, after, limit)
+    else:
+        sessions, next_key = movies_crud.get_schedule_page(db, filters, after, limit)
+
+    next_url = None
+    if next_key:
+        next_url = str(request.url.include_query_params(cursor=movies_crud.encode_cursor(next_key)))
+    # Первая страница — те же фильтры без курсора
+    first_url = str(request.url.remove_query_params("cursor")) if cursor else None
 
-    # Создаём список только с базовыми полями
-    sessions = [
+    return templates.TemplateResponse(
+        "home.html",
         {
-            "id": s.id,
-            "movie": s.movie,
-            "cinema": s.cinema,
-            "time": s.time
+            "request": request,
+            "sessions": sessions,
+            "filters": filters,
+            "next_url": next_url,
+            "first_url": first_url,
+            # Версия расписания — часть ключа кэша фрагмента сетки сеансов
+            "data_version": schedule_cache.version
         }
-        for s in sessions_full
-    ]
+    )
+
+
+@router.get("/search", response_class=HTMLResponse)
+def search_get(
+        request: Request,
+        q: str = Query("", max_length=100),
+        limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=SESSIONS_PAGE_SIZE_MAX),
+        filters: SessionFilters = Depends(session_filters),
+        db: Session = Depends(get_db)
+):
+    """
+    Поиск предстоящих сеансов по названию фильма, описанию и кинотеатру.
+    Выводит самые релевантные сеансы в той же сетке, что и главная страница, без пагинации.
+    Пустой запрос возвращает на главную.
+    """
+    token = request.cookies.get("access_token_user")
+    if not token:
+        return RedirectResponse(url="/user/login")
 
-    return templates.TemplateResponse("home.html", {"request": request, "sessions": sessions})
+    try:
+        verify_token(token, mode=False)
+    except Exception:
+        return RedirectResponse(url="/user/login")
+
+    if not q.strip():
+        return RedirectResponse(url="/")
+
+    sessions = movies_crud.search_sessions(db, q, filters, limit)
+
+    return templates.TemplateResponse(
+        "home.html",
+        {
+            "request": request,
+            "sessions": sessions,
+            "filters": filters,
+            "query": q,
+            # Результаты поиска — одна страница, ссылки на другие страницы не нужны
+            "next_url": None,
+            "first_url": None,
+            "data_version": schedule_cache.version
+        }
+    )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.config import METRICS_TOKEN
+from app.database.coherence import coherence
+from app.database.schedule_cache import schedule_cache
+from app.database.seat_events import seat_events
+from app.utils.admission import admission_control
+from app.metrics import render_metrics, register_collector
+from app.utils.security import get_hash_pool_stats
+from app.utils.templates import fragment_cache
+from app.utils.token_cache import token_cache
+
+router = APIRouter()
+
+# Формат ответа Prometheus (charset Starlette добавляет сам)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _prefixed(prefix: str, stats: dict) -> dict:
+    """Оставляет числовые значения статистики и добавляет к именам префикс метрик."""
+    return {
+        f"cinemaflow_{prefix}_{name}": value
+        for name, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+# Состояние кэшей и очередей, которое уже считается в своих модулях, отдаётся как gauge
+register_collector(lambda: _prefixed("token_cache", token_cache.stats()))
+register_collector(lambda: _prefixed("schedule_cache", schedule_cache.stats()))
+register_collector(lambda: _prefixed("fragment_cache", fragment_cache.stats()))
+register_collector(lambda: _prefixed("hash_pool", get_hash_pool_stats()))
+register_collector(lambda: _prefixed("admission", admission_control.stats()))
+register_collector(lambda: _prefixed("seat_events", seat_events.stats()))
+register_collector(lambda: _prefixed("coherence", coherence.stats()))
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(request: Request):
+    """
+    Метрики приложения в текстовом формате Prometheus.
+    Если задан METRICS_TOKEN, требует заголовок Authorization: Bearer <token>.
+    """
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,15 +1,19 @@
+import asyncio
+import json
 from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, StreamingResponse
 from starlette.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.database.models import BookingSession
-from app.database.session import get_db
-from app.database.cruds import movies_crud
+from app.config import SEAT_EVENTS_HEARTBEAT
+from app.database.session import get_db, async_session_local
+from app.database.cruds import movies_crud, async_movies_crud
+from app.database.seat_events import seat_events, snapshot_event, SESSION_DELETED_EVENT
+from app.database.seat_map import layout, SEAT_FREE
 from app.utils.check_valid import check_token, check_user
+from app.utils.templates import templates
 
-templates = Jinja2Templates(directory="templates")
 router = APIRouter()
 
 
@@ -28,7 +32,7 @@ def session_detail(request: Request, session_id: int, db: Session = Depends(get_
     username = username_or_redirect
 
     # Проверяем пользователя
-    user_or_redirect = check_user(db, username)
+    user_or_redirect = check_user(db, username, request)
     if isinstance(user_or_redirect, RedirectResponse):
         return user_or_redirect
     user = user_or_redirect
@@ -49,5 +53,73 @@ def session_detail(request: Request, session_id: int, db: Session = Depends(get_
         return RedirectResponse(
             url=f"/user/profile/session/{existing_booking.id}", status_code=303
         )
-    # Если брони нет, отображаем страницу с деталями сеанса
-    return templates.TemplateResponse("movie_detail_home.html", {"request": request, "session": session})
+    # Если брони нет, отображаем страницу с деталями сеанса и схемой зала
+    seat_rows = layout(session.seat_map, session.seats_per_row) if session.seat_map is not None else None
+    return templates.TemplateResponse(
+        "movie_detail_home.html",
+        {"request": request, "session": session, "seat_rows": seat_rows, "seat_free": SEAT_FREE}
+    )
+
+
+async def _seat_snapshot(session_id: int) -> dict | None:
+    """
+    Читает текущее состояние мест сеанса в короткой сессии БД.
+    Схема зала передаётся строкой статусов, по символу на место.
+    """
+    async with async_session_local() as db:
+        state = await async_movies_crud.get_seat_state(db, session_id)
+    if state is None:
+        return None
+    return snapshot_event(*state)
+
+
+def _sse(event: dict, name: str = "seats") -> str:
+    """Форматирует событие для Server-Sent Events."""
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/{session_id}/live")
+async def session_live(request: Request, session_id: int):
+    """
+    Поток живой доступности мест сеанса (Server-Sent Events).
+    Сначала отдаёт снимок состояния, затем изменения, которые CRUD публикует после коммита брони.
+    Все открытые страницы сеанса получают одно и то же событие из общего pub/sub, без запросов к базе.
+    Соединение с базой держится только на время чтения снимка.
+    Если сеанс удалён, отправляет событие deleted и закрывает поток.
+    """
+    # Проверяем токен
+    username_or_redirect = check_token(request, mode=False)
+    if isinstance(username_or_redirect, RedirectResponse):
+        return username_or_redirect
+
+    # Подписываемся до чтения снимка, чтобы не пропустить изменения между ними
+    subscriber = seat_events.subscribe(session_id)
+    snapshot = await _seat_snapshot(session_id)
+    if snapshot is None:
+        seat_events.unsubscribe(session_id, subscriber)
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async def stream():
+        try:
+            yield _sse(snapshot)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), SEAT_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Комментарий SSE держит соединение живым через прокси
+                    yield ": keepalive\n\n"
+                    continue
+                if event.get("resync"):
+                    event = await _seat_snapshot(session_id) or SESSION_DELETED_EVENT
+                if event.get("deleted"):
+                    yield _sse(event, "deleted")
+                    return
+                yield _sse(event)
+        finally:
+            seat_events.unsubscribe(session_id, subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,20 +1,20 @@
 from fastapi import Request, HTTPException, Form, APIRouter, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
-from datetime import datetime
 
-from app.utils.check_valid import check_token, check_user
-from app.utils.security import verify_password, hash_password
+from app.utils.check_valid import check_token, check_user, check_user_async
+from app.utils.security import verify_password_async, hash_password_async, PasswordPoolBusy
 from app.utils.schemas import UserRegister
 from app.utils.token import create_token
-from app.database.session import get_db
-from app.database.cruds import users_crud, booking_crud
+from app.utils.token_cache import token_cache
+from app.database.session import get_db, get_async_db
+from app.database.cruds import booking_crud, async_users_crud, async_booking_crud
 from app.logger import logger
+from app.utils.templates import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/register", response_class=HTMLResponse)
@@ -30,7 +30,7 @@ async def register_user_get(request: Request):
 async def register_user_post(
         username: Annotated[str, Form(..., description="User login")],
         password: Annotated[str, Form(..., description="User password")],
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> RedirectResponse:
     """
     Обрабатывает POST-запрос на регистрацию нового пользователя.
@@ -38,13 +38,19 @@ async def register_user_post(
     создает запись в БД и устанавливает токен в cookie.
     """
     # проверяем, есть ли пользователь
-    existing_user = users_crud.get_user_by_username(db, username)
+    existing_user = await async_users_crud.get_user_by_username(db, username)
     if existing_user:
         raise HTTPException(status_code=409, detail="User already registered")
 
+    # хешируем пароль в пуле потоков, не блокируя event loop
+    try:
+        hashed_password = await hash_password_async(password)
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many requests, try again later")
+
     # создаем нового пользователя
-    user_info = UserRegister(username=username, password=hash_password(password))
-    users_crud.create_user(db, user_info)
+    user_info = UserRegister(username=username, password=hashed_password)
+    await async_users_crud.create_user(db, user_info)
 
     # создаем токен
     token = create_token(username, mode=False)
@@ -68,7 +74,7 @@ async def login_user_get(request: Request):
 async def login_user_post(
         username: Annotated[str, Form(..., description="User login")],
         password: Annotated[str, Form(..., description="User password")],
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> RedirectResponse:
     """
     Обрабатывает POST-запрос на вход пользователя.
@@ -76,12 +82,16 @@ async def login_user_post(
     создает токен и устанавливает его в cookie.
     """
     # ищем пользователя
-    existing_user = users_crud.get_user_by_username(db, username)
+    existing_user = await async_users_crud.get_user_by_username(db, username)
     if not existing_user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    # проверяем пароль
-    if not verify_password(password, existing_user.password):
+    # проверяем пароль в пуле потоков, не блокируя event loop
+    try:
+        is_valid = await verify_password_async(password, existing_user.password)
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts, try again later")
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     # создаем токен
@@ -92,17 +102,21 @@ async def login_user_post(
 
 
 @router.get("/logout", response_class=RedirectResponse)
-async def logout_user_get() -> RedirectResponse:
+async def logout_user_get(request: Request) -> RedirectResponse:
     """
-    Выход пользователя: удаляет токен из cookie и делает редирект на главную.
+    Выход пользователя: удаляет токен из cookie и кэша токенов, делает редирект на главную.
     """
+    token = request.cookies.get("access_token_user")
+    if token:
+        token_cache.invalidate(token)
+
     response = RedirectResponse(url="/")
     response.delete_cookie("access_token_user")
     return response
 
 
 @router.get("/profile", response_class=HTMLResponse)
-async def user_profile_get(request: Request, db: Session = Depends(get_db)):
+async def user_profile_get(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Возвращает профиль пользователя с данными и будущими бронированиями.
     Проверяет токен и существование пользователя в БД.
@@ -115,14 +129,13 @@ async def user_profile_get(request: Request, db: Session = Depends(get_db)):
     username = username_or_redirect
 
     # Проверяем пользователя
-    user_or_redirect = check_user(db, username)
+    user_or_redirect = await check_user_async(db, username, request)
     if isinstance(user_or_redirect, RedirectResponse):
         return user_or_redirect
     user = user_or_redirect
 
-    # Получаем все будущие забронированные сеансы
-    now = datetime.now()
-    bookings = [b for b in user.bookings if b.movie.time >= now]
+    # Получаем будущие забронированные сеансы одним запросом
+    bookings = await async_booking_crud.get_future_bookings_by_user(db, user.id)
 
     # Отправляем данные в шаблон
     return templates.TemplateResponse(
@@ -149,7 +162,7 @@ def session_detail(request: Request, booking_id: int, db: Session = Depends(get_
     username = username_or_redirect
 
     # Проверяем пользователя
-    user_or_redirect = check_user(db, username)
+    user_or_redirect = check_user(db, username, request)
     if isinstance(user_or_redirect, RedirectResponse):
         return user_or_redirect
 
@@ -2,4 +2,5 @@ from app.utils import check_valid
 from app.utils import exception_handlers
 from app.utils import security
 from app.utils import token
-from app.utils import schemas
\ No newline at end of file
+from app.utils import schemas
+from app.utils import token_cache
\ No newline at end of file
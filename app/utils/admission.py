@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from fastapi import Request
+
+from app.config import (
+    SECRET_KEY_USER, ADMISSION_ENABLED, ADMISSION_RATE, ADMISSION_BURST,
+    ADMISSION_MAX_CONCURRENCY, ADMISSION_TICKET_TTL
+)
+
+# Через сколько секунд простоя очередь сеанса удаляется из памяти
+IDLE_QUEUE_TTL = 300
+
+
+class WaitingRoom(Exception):
+    """
+    Запрос не допущен к бронированию: пользователь стоит в очереди.
+    Хранит номер билета, позицию в очереди и оценку ожидания в секундах.
+    Билет и позиция равны None, если очередь пройдена, но заняты все слоты бронирования.
+    """
+
+    def __init__(self, session_id: int, ticket: int | None, position: int | None, wait_seconds: int):
+        self.session_id = session_id
+        self.ticket = ticket
+        self.position = position
+        self.wait_seconds = wait_seconds
+
+
+@dataclass(slots=True)
+class SessionQueue:
+    """
+    Состояние допуска на один сеанс: токены ведра, выданные и допущенные билеты.
+    Билеты с номером меньше admitted уже получили свой токен и проходят без ожидания.
+    """
+    tokens: float
+    updated: float
+    next_ticket: int = 0
+    admitted: int = 0
+    # Время, когда билету была выдана очередь на вход (для истечения неиспользованных допусков)
+    admitted_at: dict[int, float] = field(default_factory=dict)
+
+
+class AdmissionControl:
+    """
+    Виртуальная очередь на горячие сеансы.
+    На каждый сеанс — token bucket (rate токенов в секунду, запас burst) и FIFO-очередь билетов:
+    новые токены сначала отдаются стоящим в очереди по порядку, и только при пустой очереди
+    запрос проходит сразу. Дополнительно ограничено число одновременных бронирований в процессе.
+    Решение принимается в памяти, до любой работы с базой.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, ticket_ttl: int):
+        self.rate = rate
+        self.burst = burst
+        self.ticket_ttl = ticket_ttl
+        self.queues: dict[int, SessionQueue] = {}
+        self.lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.rejected_busy = 0
+
+    def _refill(self, queue: SessionQueue, now: float) -> None:
+        """
+        Начисляет токены за прошедшее время и раздаёт их билетам в порядке очереди.
+        Лимит burst применяется к остатку после раздачи, чтобы очередь не теряла
+        токены, накопленные, пока её никто не опрашивал.
+        """
+        queue.tokens += (now - queue.updated) * self.rate
+        queue.updated = now
+        while queue.tokens >= 1 and queue.admitted < queue.next_ticket:
+            queue.admitted_at[queue.admitted] = now
+            queue.admitted += 1
+            queue.tokens -= 1
+        queue.tokens = min(self.burst, queue.tokens)
+        # Допуски, которыми не воспользовались вовремя, сгорают
+        for ticket, at in list(queue.admitted_at.items()):
+            if now - at > self.ticket_ttl:
+                del queue.admitted_at[ticket]
+
+    def _prune(self, now: float) -> None:
+        """Удаляет очереди сеансов, в которых давно никого нет."""
+        for session_id, queue in list(self.queues.items()):
+            if queue.admitted == queue.next_ticket and not queue.admitted_at and now - queue.updated > IDLE_QUEUE_TTL:
+                del self.queues[session_id]
+
+    def _position(self, session_id: int, queue: SessionQueue, ticket: int) -> WaitingRoom:
+        """Считает позицию билета в очереди и оценку ожидания."""
+        position = ticket - queue.admitted + 1
+        wait_seconds = math.ceil(max(0.0, position - queue.tokens) / self.rate)
+        return WaitingRoom(session_id, ticket, position, wait_seconds)
+
+    def admit(self, session_id: int, ticket: int | None) -> None:
+        """
+        Решает, можно ли пустить запрос к бронированию сеанса.
+        ticket — номер билета из cookie, если пользователь уже стоит в очереди.
+        Если нельзя, выбрасывает WaitingRoom с (возможно новым) билетом и позицией.
+        """
+        now = time.monotonic()
+        with self.lock:
+            queue = self.queues.get(session_id)
+            if queue is None:
+                if len(self.queues) > 1000:
+                    self._prune(now)
+                queue = self.queues[session_id] = SessionQueue(tokens=self.burst, updated=now)
+            self._refill(queue, now)
+
+            if ticket is not None and ticket < queue.next_ticket:
+                if ticket >= queue.admitted:
+                    raise self._position(session_id, queue, ticket)
+                if queue.admitted_at.pop(ticket, None) is not None:
+                    self.admitted_total += 1
+                    return
+                # Допуск по билету истёк или уже использован — встаём в конец очереди
+
+            if queue.admitted == queue.next_ticket and queue.tokens >= 1:
+                queue.tokens -= 1
+                self.admitted_total += 1
+                return
+
+            ticket = queue.next_ticket
+            queue.next_ticket += 1
+            self.queued_total += 1
+            raise self._position(session_id, queue, ticket)
+
+    def acquire(self) -> bool:
+        """Занимает слот одновременного бронирования; False — все слоты заняты."""
+        with self.lock:
+            if self.in_flight >= self.max_concurrency:
+                self.rejected_busy += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Освобождает слот одновременного бронирования."""
+        with self.lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Возвращает состояние очередей и счётчики допуска."""
+        with self.lock:
+            waiting = sum(q.next_ticket - q.admitted for q in self.queues.values())
+            return {
+                "sessions": len(self.queues),
+                "waiting": waiting,
+                "in_flight": self.in_flight,
+                "admitted": self.admitted_total,
+                "queued": self.queued_total,
+                "rejected_busy": self.rejected_busy,
+            }
+
+
+def ticket_cookie_name(session_id: int) -> str:
+    """Имя cookie с билетом очереди на сеанс."""
+    return f"queue_ticket_{session_id}"
+
+
+def sign_ticket(session_id: int, ticket: int) -> str:
+    """Подписывает билет, чтобы номер в очереди нельзя было подделать в cookie."""
+    message = f"{session_id}:{ticket}".encode()
+    signature = hmac.new((SECRET_KEY_USER or "").encode(), message, hashlib.sha256).hexdigest()[:16]
+    return f"{ticket}.{signature}"
+
+
+def read_ticket(request: Request, session_id: int) -> int | None:
+    """Читает и проверяет билет из cookie; поддельный или битый билет игнорируется."""
+    value = request.cookies.get(ticket_cookie_name(session_id))
+    if not value or "." not in value:
+        return None
+    ticket, _ = value.split(".", 1)
+    if not ticket.isdigit() or not hmac.compare_digest(sign_ticket(session_id, int(ticket)), value):
+        return None
+    return int(ticket)
+
+
+async def admission(request: Request, session_id: int):
+    """
+    Зависимость FastAPI: допуск к бронированию сеанса.
+    Пропускает запрос по token bucket / очереди и держит слот одновременного
+    бронирования до окончания обработки. Иначе выбрасывает WaitingRoom,
+    который превращается в страницу ожидания или JSON с позицией в очереди.
+    """
+    if not ADMISSION_ENABLED:
+        yield
+        return
+
+    # Слот проверяется до очереди, чтобы не сжечь токен запроса, который всё равно не пройдёт
+    if not admission_control.acquire():
+        raise WaitingRoom(session_id, None, None, 1)
+    try:
+        admission_control.admit(session_id, read_ticket(request, session_id))
+    except WaitingRoom:
+        admission_control.release()
+        raise
+    try:
+        yield
+    finally:
+        admission_control.release()
+
+
+# Общий экземпляр на процесс
+admission_control = AdmissionControl(ADMISSION_RATE, ADMISSION_BURST, ADMISSION_MAX_CONCURRENCY, ADMISSION_TICKET_TTL)
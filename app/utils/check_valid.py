@@ -1,10 +1,13 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.cruds import users_crud
+from app.database.cruds import users_crud, async_users_crud
 from app.database.models import UserSession
+from app.logger import bind_log_user
 from app.utils.token import verify_token
+from app.utils.token_cache import token_cache, CurrentUser
 
 
 def check_token(request: Request, mode: bool = False) -> str | RedirectResponse:
@@ -27,13 +30,65 @@ def check_token(request: Request, mode: bool = False) -> str | RedirectResponse:
         return RedirectResponse(url=redirect_url, status_code=303)
 
 
-def check_user(db: Session, username: str) -> UserSession | RedirectResponse:
+def _cached_user(request: Request | None, username: str) -> CurrentUser | None:
+    """
+    Возвращает пользователя из кэша токенов, если id уже был найден для этого токена.
+    """
+    if request is None:
+        return None
+    token = request.cookies.get("access_token_user")
+    entry = token_cache.peek(token, mode=False) if token else None
+    if entry is None or entry.user_id is None or entry.subject != username:
+        return None
+    bind_log_user(entry.user_id)
+    return CurrentUser(id=entry.user_id, username=username)
+
+
+def _remember_user(request: Request | None, user: UserSession) -> CurrentUser:
+    """
+    Запоминает id пользователя в записи кэша для токена из запроса и в контексте логов.
+    """
+    if request is not None:
+        token = request.cookies.get("access_token_user")
+        entry = token_cache.peek(token, mode=False) if token else None
+        if entry is not None and entry.subject == user.username:
+            entry.user_id = user.id
+    bind_log_user(user.id)
+    return CurrentUser(id=user.id, username=user.username)
+
+
+def check_user(db: Session, username: str, request: Request | None = None) -> CurrentUser | RedirectResponse:
     """
     Проверяет существование пользователя в базе по username.
+    Если передан request, id пользователя кэшируется вместе с токеном,
+    и повторные запросы с тем же токеном не обращаются к таблице users.
     Если пользователь не найден, возвращает RedirectResponse на страницу входа.
-    Иначе возвращает объект UserSession с данными пользователя.
+    Иначе возвращает CurrentUser с id и username.
     """
+    cached = _cached_user(request, username)
+    if cached is not None:
+        return cached
+
     user = users_crud.get_user_by_username(db, username)
     if not user:
         return RedirectResponse(url="/user/login", status_code=303)
-    return user
+    return _remember_user(request, user)
+
+
+async def check_user_async(
+        db: AsyncSession,
+        username: str,
+        request: Request | None = None
+) -> CurrentUser | RedirectResponse:
+    """
+    Асинхронный вариант check_user для обработчиков на AsyncSession.
+    Если пользователь не найден, возвращает RedirectResponse на страницу входа.
+    """
+    cached = _cached_user(request, username)
+    if cached is not None:
+        return cached
+
+    user = await async_users_crud.get_user_by_username(db, username)
+    if not user:
+        return RedirectResponse(url="/user/login", status_code=303)
+    return _remember_user(request, user)
@@ -0,0 +1,93 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Iterator, Iterable
+
+from app.config import EXPORT_BATCH_SIZE, EXPORT_GZIP_LEVEL
+from app.database.session import session_local
+from app.database.cruds import movies_crud, booking_crud
+from app.utils.json_response import dump_json
+
+EXPORT_KINDS = ("sessions", "bookings")
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# MIME-типы выгрузок
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# Функции потокового чтения из базы для каждого вида выгрузки
+EXPORT_READERS = {
+    "sessions": movies_crud.iter_sessions_for_export,
+    "bookings": booking_crud.iter_bookings_for_export,
+}
+
+
+def _csv_value(value):
+    """Приводит значение к виду для CSV: время — в ISO 8601, None — пустая строка."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def iter_csv(columns: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    """CSV с заголовком; одна пачка строк — один кусок вывода."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(columns: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    """NDJSON: по объекту на строку; одна пачка строк — один кусок вывода."""
+    for batch in batches:
+        yield b"".join(dump_json(dict(zip(columns, row))) + b"\n" for row in batch)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = EXPORT_GZIP_LEVEL) -> Iterator[bytes]:
+    """Сжимает поток кусков в формат gzip на лету, не собирая его целиком."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(
+        kind: str,
+        file_format: str,
+        compress: bool = False,
+        batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Генератор выгрузки kind ("sessions" / "bookings") в CSV или NDJSON, по желанию в gzip.
+    Открывает собственную сессию БД на время выгрузки и закрывает её в конце
+    (в том числе если клиент оборвал скачивание). Память не зависит от размера таблиц:
+    одновременно обрабатывается одна пачка из batch_size строк.
+    """
+    if kind not in EXPORT_READERS:
+        raise ValueError(f"Unknown export kind: {kind}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+
+    db = session_local()
+    try:
+        columns, batches = EXPORT_READERS[kind](db, batch_size)
+        chunks = iter_csv(columns, batches) if file_format == "csv" else iter_ndjson(columns, batches)
+        if compress:
+            chunks = gzip_chunks(chunks)
+        yield from chunks
+    finally:
+        db.close()
+
+
+def export_filename(kind: str, file_format: str, compress: bool = False) -> str:
+    """Имя файла выгрузки с отметкой времени."""
+    name = f"{kind}-{datetime.now():%Y%m%d-%H%M%S}.{file_format}"
+    return f"{name}.gz" if compress else name
@@ -1,8 +1,10 @@
 from fastapi import Request
+from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from fastapi.templating import Jinja2Templates
 
-templates = Jinja2Templates(directory="templates")
+from app.config import ADMISSION_REFRESH
+from app.utils.admission import WaitingRoom, ticket_cookie_name, sign_ticket
+from app.utils.templates import templates
 
 
 def register_exception_handlers(app):
@@ -10,12 +12,16 @@ def register_exception_handlers(app):
     Регистрирует обработчики исключений для FastAPI-приложения.
     Все стандартные HTTP-ошибки (400, 401, 403, 404, 405, 409, 422, 500, 503)
     обрабатываются и возвращают шаблон 'error.html' с кодом ошибки.
+    Для JSON API (/api/...) ошибки возвращаются в JSON, а не страницей.
+    WaitingRoom (очередь на бронирование) возвращает страницу ожидания или JSON.
     Остальные исключения пробрасываются дальше.
     """
 
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         """Обрабатывает указанные коды ошибок и возвращает шаблон error.html."""
+        if request.url.path.startswith("/api/"):
+            return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
         if exc.status_code in (400, 401, 403, 404, 405, 409, 422, 500, 503):
             return templates.TemplateResponse(
                 "error.html",
@@ -24,3 +30,33 @@ def register_exception_handlers(app):
             )
         # остальные ошибки — пробрасываем дальше
         raise exc
+
+    @app.exception_handler(WaitingRoom)
+    async def waiting_room_handler(request: Request, exc: WaitingRoom):
+        """
+        Отвечает 503 с Retry-After: JSON с позицией в очереди для API-клиентов
+        или лёгкую страницу ожидания, которая сама повторяет запрос.
+        Номер билета сохраняется в подписанной cookie.
+        """
+        retry_after = max(ADMISSION_REFRESH, min(exc.wait_seconds, 30))
+        headers = {"Retry-After": str(retry_after)}
+        if "application/json" in request.headers.get("accept", ""):
+            response = JSONResponse(
+                {"status": "waiting", "position": exc.position, "wait_seconds": exc.wait_seconds},
+                status_code=503,
+                headers=headers
+            )
+        else:
+            response = templates.TemplateResponse(
+                "waiting_room.html",
+                {"request": request, "position": exc.position, "wait_seconds": exc.wait_seconds,
+                 "refresh": retry_after},
+                status_code=503,
+                headers=headers
+            )
+        if exc.ticket is not None:
+            response.set_cookie(
+                ticket_cookie_name(exc.session_id), sign_ticket(exc.session_id, exc.ticket),
+                max_age=3600, httponly=True
+            )
+        return response
@@ -0,0 +1,53 @@
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Строит сильный ETag из частей, которые однозначно определяют ответ
+    (версия данных, параметры запроса и т.п.).
+    """
+    digest = hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Форматирует время (UTC) для заголовков Last-Modified."""
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """
+    Проверяет условный GET.
+    If-None-Match важнее If-Modified-Since: если он передан, дата не проверяется.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: datetime | None = None, cache_control: str = "no-cache") -> dict:
+    """Заголовки валидаторов кэша для ответа."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime | None = None, cache_control: str = "no-cache") -> Response:
+    """Ответ 304 без тела с теми же валидаторами."""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified, cache_control))
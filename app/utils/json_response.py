@@ -0,0 +1,91 @@
+from functools import lru_cache
+from typing import Any, Iterable
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from app.config import JSON_STREAM_CHUNK_SIZE
+
+# orjson — необязательная зависимость: если установлен, им сериализуются нетипизированные данные
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=64)
+def json_adapter(tp: Any) -> TypeAdapter:
+    """
+    Возвращает (и кэширует) TypeAdapter для типа ответа.
+    Сериализатор строится один раз, дальше dump_json пишет байты напрямую, без промежуточных dict.
+    """
+    return TypeAdapter(tp)
+
+
+def dump_json(content: Any, adapter: TypeAdapter | None = None) -> bytes:
+    """
+    Сериализует данные в JSON-байты самым быстрым доступным способом:
+    по типу (TypeAdapter), модели Pydantic — её собственным сериализатором,
+    остальное (dict, списки, dataclass-строки) — orjson или pydantic_core.
+    """
+    if adapter is not None:
+        return adapter.dump_json(content)
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content)
+    return to_json(content)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON-ответ без json.dumps и model_dump: модели Pydantic v2 и строки-датаклассы
+    сериализуются сразу в байты. adapter — TypeAdapter типа содержимого (см. json_adapter),
+    с ним сериализатор не угадывает типы и работает быстрее всего.
+    """
+    media_type = "application/json"
+
+    def __init__(self, content: Any, adapter: TypeAdapter | None = None, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content, self.adapter)
+
+
+def iter_json_array(
+        items: Iterable,
+        item_type: Any,
+        chunk_size: int = JSON_STREAM_CHUNK_SIZE,
+        prefix: bytes = b"[",
+        suffix: bytes = b"]"
+):
+    """
+    Генератор JSON-массива по частям: элементы сериализуются пачками по chunk_size
+    через TypeAdapter(list[item_type]), и в памяти одновременно не больше одной пачки.
+    prefix/suffix позволяют обернуть массив в объект.
+    """
+    adapter = json_adapter(list[item_type])
+    yield prefix
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + adapter.dump_json(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + adapter.dump_json(chunk)[1:-1]
+    yield suffix
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """
+    Потоковый JSON-массив для больших выборок: отправка начинается с первой пачки,
+    весь ответ целиком не собирается.
+    """
+
+    def __init__(self, items: Iterable, item_type: Any, chunk_size: int = JSON_STREAM_CHUNK_SIZE, **kwargs):
+        kwargs.setdefault("media_type", "application/json")
+        super().__init__(iter_json_array(items, item_type, chunk_size), **kwargs)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Annotated
-from datetime import datetime
+from datetime import datetime, date
+
+from app.config import DEFAULT_SEATS_PER_ROW, SESSION_MAX_DURATION
 
 
 class Admin(BaseModel):
@@ -121,9 +123,104 @@ class MovieSessionFull(MovieSessionBase):
     ]
     duration: Annotated[
         int,
-        Field(..., gt=0, description="Duration of the session in minutes")
+        Field(..., gt=0, le=SESSION_MAX_DURATION, description="Duration of the session in minutes")
+    ]
+    seats_per_row: Annotated[
+        int,
+        Field(DEFAULT_SEATS_PER_ROW, gt=0, description="Number of seats in a row of the hall")
     ]
     description: Annotated[
-        str,
+        str | None,
         Field(None, max_length=2000, description="Description of the movie")
     ]
+
+
+# Фильтры списков сеансов (главная страница и админ-панель)
+class SessionFilters(BaseModel):
+    """
+    Фильтры списка сеансов: кинотеатр, зал, фильм и диапазон дат.
+    Пустые значения из формы считаются отсутствующими.
+    """
+    cinema: Annotated[
+        str | None,
+        Field(None, description="The cinema name")
+    ]
+    hall: Annotated[
+        str | None,
+        Field(None, description="The hall name")
+    ]
+    movie: Annotated[
+        str | None,
+        Field(None, description="The name of the movie")
+    ]
+    date_from: Annotated[
+        date | None,
+        Field(None, description="First day of the range")
+    ]
+    date_to: Annotated[
+        date | None,
+        Field(None, description="Last day of the range")
+    ]
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def empty_to_none(cls, value):
+        """Пустая строка из формы означает отсутствие фильтра."""
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    def is_empty(self) -> bool:
+        """Проверяет, что ни один фильтр не задан."""
+        return all(value is None for value in self.model_dump().values())
+
+
+# Схемы ответов JSON API (/api/v1)
+class SessionItemOut(MovieSessionBase):
+    """
+    Сеанс в списке расписания: id и базовые поля.
+    """
+    id: int
+
+
+class SessionPageOut(BaseModel):
+    """
+    Страница расписания и курсор следующей страницы (None — страниц больше нет).
+    """
+    items: list[SessionItemOut]
+    next_cursor: str | None = None
+
+
+class MovieSessionOut(MovieSessionFull):
+    """
+    Полная информация о сеансе для API.
+    seats здесь — количество свободных мест, поэтому допускает 0.
+    duration не ограничен SESSION_MAX_DURATION: лимит проверяется при создании,
+    а в базе могут быть более длинные сеансы (созданные до лимита или до его уменьшения).
+    """
+    id: int
+    seats: Annotated[
+        int,
+        Field(..., ge=0, description="Number of free seats")
+    ]
+    duration: Annotated[
+        int,
+        Field(..., gt=0, description="Duration of the session in minutes")
+    ]
+
+
+class BookingOut(BaseModel):
+    """
+    Бронь пользователя: сеанс, место (с нуля, None — без схемы зала) и статус.
+    """
+    id: int
+    movie: str
+    cinema: str
+    hall: str
+    time: datetime
+    seat: int | None = None
+    seats_per_row: int
+    status: str
+
+    class Config:
+        from_attributes = True
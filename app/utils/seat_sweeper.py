@@ -0,0 +1,32 @@
+import asyncio
+
+from app.config import SEAT_SWEEP_INTERVAL
+from app.database.session import async_session_local
+from app.database.cruds import async_booking_crud
+from app.logger import logger
+
+
+async def sweep_expired_holds() -> int:
+    """
+    Один проход очистки: снимает просроченные удержания мест.
+    Возвращает количество освобождённых мест.
+    """
+    async with async_session_local() as db:
+        return await async_booking_crud.release_expired_holds(db)
+
+
+async def run_seat_sweeper(interval: float = SEAT_SWEEP_INTERVAL) -> None:
+    """
+    Фоновая задача: раз в interval секунд возвращает в продажу места,
+    удержание которых не было подтверждено вовремя.
+    Ошибки прохода логируются и не останавливают цикл.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            released = await sweep_expired_holds()
+        except Exception:
+            logger.exception("Ошибка при очистке просроченных удержаний")
+            continue
+        if released:
+            logger.info(f"Освобождено просроченных удержаний: {released}")
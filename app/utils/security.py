@@ -1,13 +1,94 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+from app.metrics import password_hashes, password_hash_seconds
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# Argon2 (argon2-cffi) отпускает GIL во время вычисления хеша,
+# поэтому ограниченный пул потоков даёт настоящую параллельность и не блокирует event loop
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+
+# Метрики пула: ожидающие в очереди, выполняемые, завершённые и отклонённые задачи
+hash_pool_stats = {"queued": 0, "in_flight": 0, "completed": 0, "rejected": 0, "max_queued": 0}
+stats_lock = threading.Lock()
+
+
+class PasswordPoolBusy(RuntimeError):
+    """Очередь на хеширование паролей переполнена."""
+
 
 def hash_password(password: str) -> str:
     """Хеширует переданный пароль с использованием алгоритма Argon2."""
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hashes.inc(operation="hash")
+        password_hash_seconds.observe(time.perf_counter() - started, operation="hash")
 
 
 def verify_password(plain_password: str, hashed_password) -> bool:
     """Проверяет, соответствует ли обычный пароль его хешу."""
-    return pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        password_hashes.inc(operation="verify")
+        password_hash_seconds.observe(time.perf_counter() - started, operation="verify")
+
+
+def _run_tracked(func, *args):
+    """Выполняет функцию в потоке пула и обновляет метрики очереди."""
+    with stats_lock:
+        hash_pool_stats["queued"] -= 1
+        hash_pool_stats["in_flight"] += 1
+    try:
+        return func(*args)
+    finally:
+        with stats_lock:
+            hash_pool_stats["in_flight"] -= 1
+            hash_pool_stats["completed"] += 1
+
+
+async def _run_in_pool(func, *args):
+    """
+    Ставит вычисление в пул потоков Argon2 и ожидает результат, не блокируя event loop.
+    Если очередь длиннее PASSWORD_HASH_MAX_QUEUE, выбрасывает PasswordPoolBusy.
+    """
+    with stats_lock:
+        if PASSWORD_HASH_MAX_QUEUE and hash_pool_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+            hash_pool_stats["rejected"] += 1
+            raise PasswordPoolBusy("Password hashing queue is full")
+        hash_pool_stats["queued"] += 1
+        hash_pool_stats["max_queued"] = max(hash_pool_stats["max_queued"], hash_pool_stats["queued"])
+
+    future = hash_executor.submit(_run_tracked, func, *args)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # Задача так и не начала выполняться — убираем её из очереди
+        if future.cancel():
+            with stats_lock:
+                hash_pool_stats["queued"] -= 1
+        raise
+
+
+async def hash_password_async(password: str) -> str:
+    """Асинхронно хеширует пароль в пуле потоков Argon2."""
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password) -> bool:
+    """Асинхронно проверяет пароль в пуле потоков Argon2."""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+def get_hash_pool_stats() -> dict:
+    """Возвращает снимок метрик пула хеширования паролей."""
+    with stats_lock:
+        return {**hash_pool_stats, "workers": PASSWORD_HASH_WORKERS}
@@ -0,0 +1,191 @@
+import csv
+import json
+from itertools import chain
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, TextIO
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.config import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from app.database.cruds import movies_crud
+from app.utils.schemas import MovieSessionFull
+
+IMPORT_FORMATS = ("csv", "json")
+
+
+@dataclass
+class ImportReport:
+    """
+    Итог массового импорта сеансов: сколько строк прочитано и создано,
+    а также ошибки по номерам строк (не больше IMPORT_MAX_ERRORS).
+    error — почему файл не дочитан до конца (строки до этого места уже импортированы).
+    """
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    error: str | None = None
+
+    def add_error(self, row: int, message: str) -> None:
+        """Регистрирует ошибку строки, сохраняя текст только для первых IMPORT_MAX_ERRORS."""
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total, "created": self.created, "failed": self.failed,
+            "errors": self.errors, "error": self.error
+        }
+
+
+def detect_format(filename: str | None) -> str:
+    """
+    Определяет формат файла по расширению: .csv — CSV, .json и .ndjson/.jsonl — JSON.
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".json", ".ndjson", ".jsonl")):
+        return "json"
+    raise ValueError("Unsupported file format, expected .csv or .json")
+
+
+def iter_csv_rows(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    """
+    Построчно читает CSV с заголовком и возвращает пары (номер строки, словарь полей).
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_json_rows(stream: TextIO) -> Iterator[tuple[int, dict | None]]:
+    """
+    Читает JSON Lines построчно (один объект на строку).
+    Если файл начинается с '[', он разбирается как JSON-массив целиком
+    (некорректный массив приводит к ValueError). Для строк, которые не удалось разобрать, возвращает (номер, None).
+    """
+    first_line = stream.readline()
+    if first_line.lstrip().startswith("["):
+        rows = json.loads(first_line + stream.read())
+        for number, row in enumerate(rows, start=1):
+            yield number, row if isinstance(row, dict) else None
+        return
+
+    for number, line in enumerate(chain((first_line,), stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def parse_session_row(row: dict) -> MovieSessionFull:
+    """
+    Проверяет строку импорта схемой MovieSessionFull.
+    Время можно передать одной колонкой time ("2025-01-01 18:30" или ISO)
+    либо, как в форме админ-панели, раздельно колонками date и time.
+    Пустые значения считаются отсутствующими.
+    """
+    data = {key.strip(): value for key, value in row.items() if key and value not in ("", None)}
+    if "date" in data:
+        data["time"] = f"{data.pop('date')} {data.get('time', '00:00')}"
+    return MovieSessionFull(**data)
+
+
+def describe_conflict(conflict: movies_crud.BatchConflict, batch: list[tuple[int, MovieSessionFull]]) -> str:
+    """
+    Текст ошибки строки импорта, пересекающейся в зале с другими сеансами.
+    """
+    overlaps = [
+        f"session {row.id} ({row.movie}, {row.time:%Y-%m-%d %H:%M}, {row.duration} min)"
+        for row in conflict.sessions
+    ]
+    if conflict.batch_index is not None:
+        overlaps.append(f"row {batch[conflict.batch_index][0]}")
+    return "Hall is busy: overlaps " + ", ".join(overlaps)
+
+
+def import_sessions(
+        db: Session,
+        rows: Iterable[tuple[int, dict | None]],
+        batch_size: int = IMPORT_BATCH_SIZE
+) -> ImportReport:
+    """
+    Импортирует сеансы из потока строк пачками.
+    Каждая строка проверяется схемой MovieSessionFull, ошибочные попадают в отчёт с номером строки.
+    Корректные строки накапливаются и вставляются по batch_size штук: одна транзакция на пачку.
+    Строки, пересекающиеся в зале с существующими сеансами или между собой, попадают в отчёт.
+    Если пачка не записалась, её строки вставляются по одной, и в отчёт попадают только те, что не записались.
+    Если файл не удалось дочитать (битая кодировка, CSV или JSON-массив), строки до этого места
+    импортируются, а причина возвращается в report.error.
+    """
+    report = ImportReport()
+    batch: list[tuple[int, MovieSessionFull]] = []
+
+    def insert(rows: list[tuple[int, MovieSessionFull]]) -> None:
+        # Сеансы, пересекающиеся в зале с существующими или с другими строками файла, не вставляются;
+        # проверка идёт в транзакции вставки, под блокировкой записи
+        created, conflicts = movies_crud.create_sessions_bulk(
+            db, [session for _, session in rows], skip_conflicts=True
+        )
+        report.created += created
+        for index, conflict in sorted(conflicts.items()):
+            report.add_error(rows[index][0], describe_conflict(conflict, rows))
+
+    def flush() -> None:
+        try:
+            insert(batch)
+        except Exception:
+            # Пачка откатилась целиком: по одной строке видно, какие из них не записываются
+            for item in batch:
+                try:
+                    insert([item])
+                except Exception as e:
+                    report.add_error(item[0], f"Insert failed: {e.__class__.__name__}")
+        batch.clear()
+
+    rows = iter(rows)
+    while True:
+        try:
+            number, row = next(rows)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            # UnicodeDecodeError и JSONDecodeError — подклассы ValueError
+            report.error = f"File could not be parsed after {report.total} rows: {e.__class__.__name__}"
+            break
+        report.total += 1
+        if row is None:
+            report.add_error(number, "Row is not a valid JSON object")
+            continue
+        try:
+            batch.append((number, parse_session_row(row)))
+        except ValidationError as e:
+            report.add_error(number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+        except (TypeError, AttributeError):
+            report.add_error(number, "Unexpected row structure")
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return report
+
+
+def import_sessions_file(db: Session, stream: TextIO, file_format: str, batch_size: int = IMPORT_BATCH_SIZE) -> ImportReport:
+    """
+    Импортирует сеансы из текстового потока в формате CSV или JSON.
+    """
+    if file_format == "csv":
+        rows = iter_csv_rows(stream)
+    elif file_format == "json":
+        rows = iter_json_rows(stream)
+    else:
+        raise ValueError("Unsupported file format, expected csv or json")
+    return import_sessions(db, rows, batch_size)
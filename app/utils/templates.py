@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from app.config import (
+    TEMPLATES_DIR, TEMPLATES_AUTO_RELOAD, TEMPLATES_BYTECODE_CACHE, TEMPLATES_CACHE_DIR,
+    TEMPLATE_FRAGMENT_CACHE_SIZE
+)
+from app.logger import logger
+
+
+class FragmentCache:
+    """
+    LRU-кэш отрендеренных фрагментов шаблонов.
+    Ключ фрагмента включает версию данных, поэтому при изменении данных старые записи
+    просто перестают запрашиваться и вытесняются, явная инвалидация не нужна.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: str, render) -> str:
+        """Возвращает фрагмент из кэша или рендерит его и сохраняет."""
+        with self.lock:
+            fragment = self.entries.get(key)
+            if fragment is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        fragment = render()
+        with self.lock:
+            self.entries[key] = fragment
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        """Очищает кэш фрагментов."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """Возвращает размер кэша и статистику попаданий."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Тег {% cache "имя", версия, ... %}...{% endcache %}.
+    Все аргументы тега образуют ключ: тело блока рендерится один раз на ключ,
+    дальше берётся из fragment_cache.
+    """
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, parts: list, caller) -> str:
+        key = "\x1f".join(map(str, parts))
+        return fragment_cache.get_or_render(key, caller)
+
+
+def precompile_templates() -> int:
+    """
+    Компилирует все шаблоны заранее, при старте приложения.
+    С байткод-кэшем повторный старт загружает уже скомпилированный код.
+    Возвращает количество шаблонов.
+    """
+    names = templates.env.list_templates(extensions=("html",))
+    for name in names:
+        templates.env.get_template(name)
+    logger.info(f"Шаблоны предкомпилированы: {len(names)}")
+    return len(names)
+
+
+# Общие для всего приложения кэш фрагментов и окружение шаблонов
+fragment_cache = FragmentCache(TEMPLATE_FRAGMENT_CACHE_SIZE)
+templates = Jinja2Templates(
+    directory=TEMPLATES_DIR,
+    extensions=[FragmentCacheExtension],
+    auto_reload=TEMPLATES_AUTO_RELOAD,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATES_CACHE_DIR) if TEMPLATES_BYTECODE_CACHE else None
+)
@@ -3,6 +3,8 @@ from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta, timezone
 
 from app.config import TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY_ADMIN, SECRET_KEY_USER
+from app.utils.token_cache import token_cache
+from app.metrics import jwt_verifications
 
 
 def create_token(login: str, mode: bool = False) -> str:
@@ -25,18 +27,30 @@ def create_token(login: str, mode: bool = False) -> str:
 def verify_token(token: str, mode: bool = False) -> str:
     """
     Проверяет токен и возвращает логин пользователя, если токен валидный.
+    Уже проверенные токены берутся из кэша без повторной проверки подписи.
 
     :return: логин пользователя (sub)
     :raises HTTPException: если токен просрочен или неверный
     """
+    cached = token_cache.get(token, mode)
+    if cached is not None:
+        jwt_verifications.inc(result="cached")
+        return cached.subject
+
     try:
         if mode:
             payload = jwt.decode(token, SECRET_KEY_ADMIN, algorithms=[ALGORITHM])
-            return payload["sub"]
-        payload = jwt.decode(token, SECRET_KEY_USER, algorithms=[ALGORITHM])
-        return payload["sub"]
+        else:
+            payload = jwt.decode(token, SECRET_KEY_USER, algorithms=[ALGORITHM])
 
     except ExpiredSignatureError:
+        jwt_verifications.inc(result="expired")
         raise HTTPException(status_code=401, detail="Token has expired")
     except JWTError:
+        jwt_verifications.inc(result="invalid")
         raise HTTPException(status_code=401, detail="Invalid token")
+
+    jwt_verifications.inc(result="verified")
+
+    token_cache.put(token, mode, payload["sub"], payload["exp"])
+    return payload["sub"]
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
+
+
+@dataclass(slots=True)
+class CachedToken:
+    """
+    Запись кэша проверенного токена.
+    Хранит логин (sub), момент истечения и id пользователя, если он уже найден в базе.
+    """
+    subject: str
+    expires_at: float
+    user_id: int | None = None
+
+
+@dataclass(slots=True)
+class CurrentUser:
+    """
+    Облегчённое представление авторизованного пользователя для обработчиков и шаблонов.
+    """
+    id: int
+    username: str
+
+
+class TokenCache:
+    """
+    LRU-кэш проверенных JWT с ограничением по размеру и времени жизни.
+    Запись живёт не дольше exp самого токена, поэтому просроченный токен из кэша не вернётся.
+    Потокобезопасен: синхронные обработчики выполняются в пуле потоков.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple[bool, str], CachedToken] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str, mode: bool = False) -> CachedToken | None:
+        """Возвращает запись для токена или None, если её нет или она истекла."""
+        key = (mode, token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def peek(self, token: str, mode: bool = False) -> CachedToken | None:
+        """
+        Возвращает действующую запись для токена, не меняя счётчики и порядок LRU.
+        Для повторного обращения к записи, которую в этом запросе уже нашёл verify_token.
+        """
+        with self.lock:
+            entry = self.entries.get((mode, token))
+            if entry is None or entry.expires_at <= time.time():
+                return None
+            return entry
+
+    def put(self, token: str, mode: bool, subject: str, exp: float) -> CachedToken:
+        """Сохраняет проверенный токен, вытесняя самые старые записи при переполнении."""
+        entry = CachedToken(subject=subject, expires_at=min(float(exp), time.time() + self.ttl))
+        with self.lock:
+            self.entries[(mode, token)] = entry
+            self.entries.move_to_end((mode, token))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, token: str) -> None:
+        """Удаляет токен из кэша (например, при выходе пользователя)."""
+        with self.lock:
+            for key in ((False, token), (True, token)):
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """Возвращает счётчики попаданий, промахов и текущий размер кэша."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
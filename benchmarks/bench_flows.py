@@ -0,0 +1,230 @@
+"""
+Нагрузочный бенчмарк основных сценариев на настоящем ASGI-приложении и временной базе SQLite.
+
+База наполняется заданным числом сеансов, пользователей и броней, затем виртуальные
+пользователи параллельно проходят сценарий: главная -> сеанс -> бронь -> подтверждение ->
+профиль -> отмена; администраторы листают панель, а пользователи сценария входа
+отправляют форму входа (Argon2 в пуле хеширования). Запросы идут через httpx.ASGITransport
+в том же процессе, без сети.
+
+Для каждого маршрута выводятся p50/p95/p99, среднее, пропускная способность и статусы ответов,
+результаты сохраняются в JSON (benchmarks/results/) для сравнения между коммитами.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_flows [--sessions 500] [--users 200] [--bookings 2000]
+        [--concurrency 20] [--admins 1] [--login-users 0] [--duration 20] [--compare old.json]
+
+Профили настроек сравниваются переменными окружения, например SQLite без WAL и отдельного писателя:
+    SQLITE_TUNING=0 SQLITE_SINGLE_WRITER=0 python -m benchmarks.bench_flows --output before.json
+    python -m benchmarks.bench_flows --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.common import (
+    prepare_environment, seed_sessions, seed_users, seed_login_users, percentile, run_metadata, save_results
+)
+
+
+class Recorder:
+    """Время и статусы ответов по маршрутам."""
+
+    def __init__(self):
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.timings[route].append(time.perf_counter() - started)
+        self.statuses[route][response.status_code] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            statuses = self.statuses[route]
+            routes[route] = {
+                "count": len(timings),
+                "rps": round(len(timings) / elapsed, 1),
+                "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+                "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+                "max_ms": round(timings[-1] * 1000, 2),
+                "errors": sum(count for status, count in statuses.items() if status >= 500),
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            }
+        total = sum(len(timings) for timings in self.timings.values())
+        return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 1), "routes": routes}
+
+
+def _booking_id(response) -> int | None:
+    """id брони из редиректа /user/profile/session/{id} после удержания места."""
+    location = response.headers.get("location", "")
+    prefix = "/user/profile/session/"
+    return int(location[len(prefix):]) if location.startswith(prefix) else None
+
+
+async def booking_flow(client, recorder: Recorder, session_ids: list[int], deadline: float, rng: random.Random):
+    """Сценарий зрителя: главная, сеанс, удержание и подтверждение места, профиль, отмена."""
+    while time.perf_counter() < deadline:
+        session_id = rng.choice(session_ids)
+        await recorder.request(client, "GET /", "GET", "/")
+        await recorder.request(client, "GET /session/{session_id}", "GET", f"/session/{session_id}")
+        response = await recorder.request(client, "GET /book/{session_id}", "GET", f"/book/{session_id}")
+        booking_id = _booking_id(response)
+        if booking_id is not None:
+            await recorder.request(client, "GET /book/confirm/{booking_id}", "GET", f"/book/confirm/{booking_id}")
+        await recorder.request(client, "GET /user/profile", "GET", "/user/profile")
+        if booking_id is not None:
+            await recorder.request(client, "GET /book/cancel/{booking_id}", "GET", f"/book/cancel/{booking_id}")
+
+
+async def admin_flow(client, recorder: Recorder, deadline: float):
+    """Сценарий администратора: панель с сеансами."""
+    while time.perf_counter() < deadline:
+        await recorder.request(client, "GET /admin/panel", "GET", "/admin/panel")
+
+
+async def login_flow(client, recorder: Recorder, credentials: tuple[str, str], deadline: float):
+    """Сценарий входа: форма входа с настоящей проверкой пароля."""
+    username, password = credentials
+    while time.perf_counter() < deadline:
+        await recorder.request(
+            client, "POST /user/login", "POST", "/user/login", data={"username": username, "password": password}
+        )
+
+
+async def run_load(args, session_ids, users, login_credentials) -> dict:
+    import httpx
+    from app.main import app
+    from app.utils.token import create_token
+
+    recorder = Recorder()
+    # Исключения приложения превращаются в ответ 500 и попадают в статистику, а не прерывают замер
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    rng = random.Random(args.seed)
+    clients = []
+
+    def new_client(cookies: dict | None = None):
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies)
+        clients.append(client)
+        return client
+
+    async with app.router.lifespan_context(app):
+        # Прогрев: компиляция запросов, первые соединения пула, кэш расписания
+        warmup = new_client({"access_token_user": create_token(users[0][1])})
+        await warmup.get("/")
+        await warmup.get(f"/session/{session_ids[0]}")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        tasks = []
+        for i in range(args.concurrency):
+            _, username = users[i % len(users)]
+            client = new_client({"access_token_user": create_token(username)})
+            tasks.append(booking_flow(client, recorder, session_ids, deadline, random.Random(rng.random())))
+        for _ in range(args.admins):
+            client = new_client({"access_token_admin": create_token("admin", mode=True)})
+            tasks.append(admin_flow(client, recorder, deadline))
+        for credentials in login_credentials:
+            tasks.append(login_flow(new_client(), recorder, credentials, deadline))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.aclose()
+    return recorder.summary(elapsed)
+
+
+def seed(args) -> tuple[list[int], list[tuple[int, str]], list[tuple[str, str]], int]:
+    """Наполняет временную базу; возвращает id сеансов, пользователей, данные для входа и число броней."""
+    from app.database import models
+    from app.database.cruds import booking_crud
+    from app.database.session import session_local, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session_local()
+    try:
+        session_ids = seed_sessions(db, args.sessions, args.seats)
+        # Пользователей не меньше, чем параллельных зрителей: брони разных зрителей не пересекаются
+        users = seed_users(db, max(args.users, args.concurrency))
+        login_credentials = seed_login_users(db, args.login_users)
+
+        rng = random.Random(args.seed)
+        created = 0
+        for _ in range(args.bookings):
+            user_id, _ = rng.choice(users)
+            try:
+                booking_crud.create_booking(db, user_id, rng.choice(session_ids))
+                created += 1
+            except ValueError:
+                # Повторная бронь того же сеанса или нет мест — пропускаем
+                pass
+    finally:
+        db.close()
+    return session_ids, users, login_credentials, created
+
+
+def print_summary(summary: dict, baseline: dict | None = None):
+    print(f"{summary['requests']} requests in {summary['elapsed_s']} s, {summary['rps']} req/s")
+    header = f"{'route':34} {'count':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'5xx':>5}"
+    if baseline:
+        header += f" {'p50 Δ%':>8} {'p95 Δ%':>8} {'rps Δ%':>8}"
+    print(header)
+    for route, stats in summary["routes"].items():
+        line = (
+            f"{route:34} {stats['count']:>7} {stats['rps']:>8} {stats['p50_ms']:>8} "
+            f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['errors']:>5}"
+        )
+        old = baseline["routes"].get(route) if baseline else None
+        if old:
+            line += "".join(
+                f" {(stats[key] - old[key]) / old[key] * 100 if old[key] else 0:>+8.1f}"
+                for key in ("p50_ms", "p95_ms", "rps")
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк сценариев бронирования")
+    parser.add_argument("--sessions", type=int, default=500, help="Сеансов в базе")
+    parser.add_argument("--seats", type=int, default=100, help="Мест в каждом сеансе")
+    parser.add_argument("--users", type=int, default=200, help="Пользователей в базе")
+    parser.add_argument("--bookings", type=int, default=2000, help="Броней, созданных до начала замера")
+    parser.add_argument("--concurrency", type=int, default=20, help="Параллельных зрителей")
+    parser.add_argument("--admins", type=int, default=1, help="Параллельных администраторов")
+    parser.add_argument("--login-users", type=int, default=0, help="Параллельных пользователей сценария входа")
+    parser.add_argument("--duration", type=float, default=20, help="Длительность замера в секундах")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора случайных чисел")
+    parser.add_argument("--db-dir", help="Каталог для базы (по умолчанию новый временный)")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    parser.add_argument("--compare", help="Файл результатов прошлого запуска для сравнения")
+    args = parser.parse_args()
+
+    db_path = prepare_environment(args.db_dir)
+    started = time.perf_counter()
+    session_ids, users, login_credentials, bookings = seed(args)
+    print(f"Seeded {db_path}: {len(session_ids)} sessions, {len(users)} users, {bookings} bookings "
+          f"in {time.perf_counter() - started:.1f} s")
+
+    summary = asyncio.run(run_load(args, session_ids, users, login_credentials))
+    results = {"meta": run_metadata("flows", vars(args)), **summary}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"Compared with {args.compare} (commit {baseline['meta']['commit']})")
+    print_summary(results, baseline)
+    print(f"Saved {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк сериализации JSON-ответов API на 10 000 сеансов.
+
+Сравнивает стандартный путь FastAPI (jsonable_encoder + JSONResponse на json.dumps)
+с FastJSONResponse для моделей Pydantic и для строк-датаклассов, а также потоковый ответ.
+Запуск из корня репозитория: python -m benchmarks.bench_json [--sessions 10000] [--rounds 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.database.cruds.movies_crud import SessionRow
+from app.utils.json_response import FastJSONResponse, StreamingJSONResponse, json_adapter
+from app.utils.schemas import MovieSessionOut
+
+
+def make_rows(count: int) -> list[SessionRow]:
+    """Синтетические строки сеансов."""
+    start = datetime(2030, 1, 1, 10, 0)
+    return [
+        SessionRow(
+            id=i, movie=f"Movie {i % 300}", description="A long enough description of the movie " * 3,
+            cinema=f"Cinema {i % 20}", time=start + timedelta(minutes=15 * i), hall=f"Hall {i % 8}",
+            seats=100, duration=120
+        )
+        for i in range(count)
+    ]
+
+
+def measure(render, rounds: int) -> dict:
+    """Время одного ответа в миллисекундах (медиана, p95) и размер тела."""
+    size = len(render())
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "bytes": size,
+    }
+
+
+async def consume(response: StreamingJSONResponse) -> bytes:
+    """Собирает тело потокового ответа (для замера и проверки)."""
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def run(sessions: int, rounds: int) -> dict:
+    rows = make_rows(sessions)
+    models = [MovieSessionOut.model_validate(row) for row in rows]
+    models_adapter = json_adapter(list[MovieSessionOut])
+    rows_adapter = json_adapter(list[SessionRow])
+
+    cases = {
+        "JSONResponse (jsonable_encoder)": lambda: JSONResponse(jsonable_encoder(models)).body,
+        "JSONResponse (model_dump)": lambda: JSONResponse([m.model_dump(mode="json") for m in models]).body,
+        "FastJSONResponse (models, adapter)": lambda: FastJSONResponse(models, adapter=models_adapter).body,
+        "FastJSONResponse (rows, adapter)": lambda: FastJSONResponse(rows, adapter=rows_adapter).body,
+        "FastJSONResponse (rows, untyped)": lambda: FastJSONResponse(rows).body,
+        "StreamingJSONResponse (rows)": lambda: asyncio.run(consume(StreamingJSONResponse(rows, SessionRow))),
+    }
+    return {name: measure(render, rounds) for name, render in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации JSON-ответов")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.rounds)
+    baseline = results["JSONResponse (jsonable_encoder)"]["p50_ms"]
+    print(f"{'case':40} {'p50 ms':>9} {'p95 ms':>9} {'x faster':>9} {'bytes':>10}")
+    for name, result in results.items():
+        speedup = baseline / result["p50_ms"] if result["p50_ms"] else float("inf")
+        print(f"{name:40} {result['p50_ms']:>9} {result['p95_ms']:>9} {speedup:>9.1f} {result['bytes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
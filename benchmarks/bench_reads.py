@@ -0,0 +1,99 @@
+"""
+Микробенчмарк чтения списков: полные ORM-объекты против строк с нужными колонками.
+
+На временной базе SQLite сравнивает для списка сеансов и броней пользователя:
+- db.query(MovieSession) / get_bookings_by_user — ORM-сущности с identity map;
+- get_sessions_page / get_schedule_page / get_future_bookings_by_user — кортежи колонок
+  в датаклассы со __slots__, без description там, где он не выводится.
+Выводит строк в секунду и пиковую память (tracemalloc) на один проход.
+
+Запуск из корня репозитория: python -m benchmarks.bench_reads [--sessions 10000] [--rounds 5]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.common import prepare_environment, seed_sessions, seed_users, run_metadata, save_results
+
+
+def measure(read, rounds: int) -> dict:
+    """Лучшее время прохода, строк в секунду и пиковая память одного прохода."""
+    rows = len(read())
+    timings = []
+    for _ in range(rounds):
+        gc.collect()
+        started = time.perf_counter()
+        read()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+
+    gc.collect()
+    tracemalloc.start()
+    read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "best_ms": round(best * 1000, 2),
+        "rows_per_s": round(rows / best) if best else 0,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(sessions: int, bookings: int, rounds: int) -> dict:
+    from sqlalchemy.orm import Session
+
+    from app.database import models
+    from app.database.cruds import movies_crud, booking_crud
+    from app.database.models import MovieSession
+    from app.database.session import engine
+    from app.utils.schemas import SessionFilters
+
+    models.Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        session_ids = seed_sessions(db, sessions)
+        (user_id, _), = seed_users(db, 1)
+        for session_id in session_ids[:bookings]:
+            booking_crud.create_booking(db, user_id, session_id)
+
+    filters = SessionFilters()
+
+    def with_session(read):
+        # Новая сессия на каждый проход, как в обработчике запроса: identity map не переиспользуется
+        def wrapped():
+            with Session(engine) as db:
+                return read(db)
+        return wrapped
+
+    cases = {
+        "sessions: ORM entities": lambda db: db.query(MovieSession).order_by(MovieSession.time, MovieSession.id).all(),
+        "sessions: get_sessions_page rows": lambda db: movies_crud.get_sessions_page(db, filters, limit=sessions)[0],
+        "sessions: get_schedule_page rows": lambda db: movies_crud.get_schedule_page(db, filters, limit=sessions)[0],
+        "bookings: get_bookings_by_user (ORM)": lambda db: booking_crud.get_bookings_by_user(db, user_id),
+        "bookings: get_future_bookings_by_user": lambda db: booking_crud.get_future_bookings_by_user(db, user_id),
+    }
+    return {name: measure(with_session(read), rounds) for name, read in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения: ORM-объекты против строк колонок")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=2000, help="Броней у одного пользователя")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--db-dir", help="Каталог для базы (по умолчанию новый временный)")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    args = parser.parse_args()
+
+    prepare_environment(args.db_dir)
+    cases = run(args.sessions, args.bookings, args.rounds)
+    print(f"{'case':40} {'rows':>7} {'best ms':>9} {'rows/s':>10} {'peak KB':>10}")
+    for name, result in cases.items():
+        print(f"{name:40} {result['rows']:>7} {result['best_ms']:>9} {result['rows_per_s']:>10} {result['peak_kb']:>10}")
+
+    results = {"meta": run_metadata("reads", vars(args)), "cases": cases}
+    print(f"Saved {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Общие части бенчмарков: временная база SQLite, наполнение данными, перцентили, сохранение результатов.
+
+Приложение читает настройки при импорте, поэтому prepare_environment() нужно вызвать
+до первого импорта модулей app.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def prepare_environment(directory: str | None = None) -> str:
+    """
+    Направляет приложение на новую базу SQLite во временном каталоге и приглушает логи.
+    Остальные настройки (SQLITE_TUNING, ADMISSION_ENABLED и т.д.) берутся из окружения как есть,
+    поэтому разные профили сравниваются запуском с разными переменными.
+    Возвращает путь к файлу базы.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="cinemaflow-bench-")
+    path = os.path.join(directory, "bench.db")
+    os.environ["SQL_DB_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_SQL_DB_URL", None)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("TEMPLATES_BYTECODE_CACHE", "0")
+    return path
+
+
+def letters(number: int) -> str:
+    """Номер в буквах (a, b, ..., ba, ...): имена пользователей допускают только буквы."""
+    name = ""
+    while True:
+        number, rest = divmod(number, 26)
+        name = chr(ord("a") + rest) + name
+        if not number:
+            return name
+
+
+def seed_sessions(db, count: int, seats: int = 100) -> list[int]:
+    """Создаёт count будущих сеансов пачками и возвращает их id."""
+    from app.database.cruds import movies_crud
+    from app.database.models import MovieSession
+    from app.utils.schemas import MovieSessionFull
+
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    batch = []
+    for i in range(count):
+        batch.append(MovieSessionFull(
+            movie=f"Movie {i % 50}", cinema=f"Cinema {i % 5}", time=start + timedelta(minutes=20 * i),
+            hall=f"Hall {i % 10}", seats=seats, duration=120,
+            description="A long enough description of the movie " * 3
+        ))
+        if len(batch) == 1000:
+            movies_crud.create_sessions_bulk(db, batch)
+            batch = []
+    movies_crud.create_sessions_bulk(db, batch)
+    return [row[0] for row in db.query(MovieSession.id).order_by(MovieSession.id).all()]
+
+
+def seed_users(db, count: int, prefix: str = "bench") -> list[tuple[int, str]]:
+    """
+    Создаёт count пользователей одним INSERT и возвращает (id, username).
+    Вместо хеша Argon2 (около 0.2 с на пароль) записывается заглушка: эти пользователи
+    входят по токену, созданному напрямую, а не через форму входа.
+    """
+    from sqlalchemy import insert
+    from app.database.models import UserSession
+
+    names = [f"{prefix}{letters(i)}" for i in range(count)]
+    db.execute(insert(UserSession), [{"username": name, "password": f"seed-{name}"} for name in names])
+    db.commit()
+    rows = db.query(UserSession.id, UserSession.username).filter(UserSession.username.in_(names)).all()
+    return [(row.id, row.username) for row in rows]
+
+
+def seed_login_users(db, count: int) -> list[tuple[str, str]]:
+    """Создаёт count пользователей с настоящим хешем пароля для сценария входа; возвращает (username, password)."""
+    from app.database.cruds import users_crud
+    from app.utils.schemas import UserRegister
+    from app.utils.security import hash_password
+
+    credentials = [(f"login{letters(i)}", f"loginpass{i}") for i in range(count)]
+    for username, password in credentials:
+        users_crud.create_user(db, UserRegister(username=username, password=hash_password(password)))
+    return credentials
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+def git_commit() -> str:
+    """Короткий хеш текущего коммита (или unknown вне git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_metadata(name: str, params: dict) -> dict:
+    """Сведения о запуске для сравнения результатов между коммитами."""
+    return {
+        "benchmark": name,
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        # Настройки, которые сильнее всего влияют на результат
+        "env": {
+            key: os.environ[key]
+            for key in sorted(os.environ)
+            if key.startswith(("SQLITE_", "DB_", "ADMISSION_", "PASSWORD_HASH_", "TOKEN_CACHE_", "METRICS_"))
+        },
+    }
+
+
+def save_results(results: dict, output: str | None = None) -> Path:
+    """Сохраняет результаты в JSON (по умолчанию benchmarks/results/<имя>-<коммит>-<время>.json)."""
+    if output:
+        path = Path(output)
+    else:
+        meta = results["meta"]
+        stamp = meta["started_at"].replace(":", "").replace("-", "")
+        path = RESULTS_DIR / f"{meta['benchmark']}-{meta['commit']}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
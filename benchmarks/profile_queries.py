@@ -0,0 +1,112 @@
+"""
+Регрессионная проверка числа SQL-запросов страницы профиля.
+
+Страница /user/profile должна делать одно и то же число запросов независимо от того,
+сколько у пользователя бронирований: брони со своими сеансами читаются одним запросом,
+а шаблон не обращается к ленивым связям. Скрипт открывает профиль пользователей
+с 0, 1 и --bookings бронями, считает запросы через before_cursor_execute на всех движках
+и завершается с кодом 1, если число запросов отличается от PROFILE_STATEMENTS.
+
+Фоновые задачи приложения (очистка удержаний, опрос изменений) не запускаются:
+lifespan не вызывается, поэтому в счёт попадают только запросы самой страницы.
+
+Запуск из корня репозитория:
+    python -m benchmarks.profile_queries [--bookings 200]
+"""
+import argparse
+import asyncio
+import sys
+from contextlib import contextmanager
+
+from benchmarks.common import prepare_environment, seed_sessions, seed_users, run_metadata, save_results
+
+# Пользователь по токену и его будущие брони с сеансами — по одному запросу
+PROFILE_STATEMENTS = 2
+
+
+@contextmanager
+def count_statements():
+    """Считает SQL-запросы ко всем движкам приложения внутри блока."""
+    from sqlalchemy import event
+    from app.database.session import engine, writer_engine, async_engine, async_writer_engine
+
+    counter = {"statements": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    engines = {id(e): e for e in (engine, writer_engine, async_engine.sync_engine, async_writer_engine.sync_engine)}
+    for target in engines.values():
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for target in engines.values():
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+async def profile_statements(users: list[tuple[int, str]]) -> list[tuple[int, int, int]]:
+    """Открывает профиль каждого пользователя; возвращает (статус, запросов, броней на странице)."""
+    import httpx
+    from app.main import app
+    from app.utils.token import create_token
+
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _, username in users:
+            client.cookies.set("access_token_user", create_token(username))
+            with count_statements() as counter:
+                response = await client.get("/user/profile")
+            results.append((response.status_code, counter["statements"], response.text.count("card-title")))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Число SQL-запросов страницы профиля")
+    parser.add_argument("--bookings", type=int, default=200, help="Броней у пользователя с большим профилем")
+    parser.add_argument("--db-dir", help="Каталог для базы (по умолчанию новый временный)")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    args = parser.parse_args()
+
+    prepare_environment(args.db_dir)
+    from app.database import models
+    from app.database.cruds import booking_crud
+    from app.database.session import session_local, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session_local()
+    try:
+        session_ids = seed_sessions(db, max(args.bookings, 1), seats=10)
+        # Первый пользователь — прогрев (компиляция запросов и шаблона), дальше 0, 1 и много броней
+        users = seed_users(db, 4, prefix="profile")
+        booking_counts = [1, 0, 1, args.bookings]
+        for (user_id, _), count in zip(users, booking_counts):
+            for session_id in session_ids[:count]:
+                booking_crud.create_booking(db, user_id, session_id)
+    finally:
+        db.close()
+
+    results = asyncio.run(profile_statements(users))[1:]
+    rows = [
+        {"bookings": count, "status": status, "statements": statements, "rendered": rendered}
+        for count, (status, statements, rendered) in zip(booking_counts[1:], results)
+    ]
+    ok = (
+        all(row["status"] == 200 and row["rendered"] == row["bookings"] for row in rows)
+        and all(row["statements"] == PROFILE_STATEMENTS for row in rows)
+    )
+
+    print(f"{'bookings':>8} {'status':>6} {'statements':>10} {'rendered':>8}")
+    for row in rows:
+        print(f"{row['bookings']:>8} {row['status']:>6} {row['statements']:>10} {row['rendered']:>8}")
+    print("ok:", ok)
+
+    results_file = save_results({"meta": run_metadata("profile_queries", vars(args)), "rows": rows, "ok": ok},
+                                args.output)
+    print(f"Saved {results_file}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
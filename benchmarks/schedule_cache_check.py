@@ -0,0 +1,98 @@
+"""
+Регрессионная проверка точечного обновления кэша расписания.
+
+Создание и удаление сеанса этим процессом должны обновлять кэш на месте: следующий
+get_upcoming не загружает расписание из базы, даже после того как get_version и опрос
+согласованности увидят новую версию канала schedule (её записал этот же процесс).
+Изменение из другого процесса, наоборот, должно сбросить кэш. Загрузки считаются
+по статистике кэша (reloads); скрипт завершается с кодом 1, если хоть один шаг
+прочитал расписание не столько раз, сколько ожидается.
+
+Фоновые задачи приложения не запускаются: опрос выполняется вручную (poll + apply).
+
+Запуск из корня репозитория:
+    python -m benchmarks.schedule_cache_check [--sessions 200]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_environment, seed_sessions, run_metadata, save_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Точечное обновление кэша расписания")
+    parser.add_argument("--sessions", type=int, default=200, help="Сеансов в расписании")
+    parser.add_argument("--db-dir", help="Каталог для базы (по умолчанию новый временный)")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    args = parser.parse_args()
+
+    prepare_environment(args.db_dir)
+    from sqlalchemy import insert
+    from app.main import coherence
+    from app.database.coherence import bump_version
+    from app.database.cruds import movies_crud
+    from app.database.models import MovieSession
+    from app.database.schedule_cache import schedule_cache
+    from app.database.session import session_local
+    from app.utils.schemas import MovieSessionFull
+
+    db = session_local()
+    rows = []
+    try:
+        seed_sessions(db, args.sessions, seats=10)
+        schedule_cache.get_version(db)
+        # Первый опрос только запоминает версии каналов
+        coherence.apply(*coherence.poll())
+
+        def step(name: str, action, expected_reloads: int) -> None:
+            """Выполняет действие, затем чтение как у API и опрос; сравнивает число загрузок."""
+            before = schedule_cache.stats()["reloads"]
+            action()
+            coherence.apply(*coherence.poll())
+            schedule_cache.get_version(db)
+            size = len(schedule_cache.get_upcoming(db))
+            reloads = schedule_cache.stats()["reloads"] - before
+            rows.append({"step": name, "reloads": reloads, "expected": expected_reloads, "size": size})
+
+        created = {}
+
+        def create():
+            created["session"] = movies_crud.create_session(db, MovieSessionFull(
+                movie="Check", cinema="Check cinema", hall="Check hall", seats=10, duration=90,
+                time=datetime.now().replace(second=0, microsecond=0) + timedelta(days=30)
+            ))
+
+        def other_process_create():
+            # Так же, как create_session другого воркера: своя транзакция, кэш этого процесса не знает о ней
+            other = session_local()
+            try:
+                bump_version(other, "schedule")
+                other.execute(insert(MovieSession), [{
+                    "movie": "Other", "cinema": "Other cinema", "hall": "Other hall", "seats": 10,
+                    "duration": 90, "time": datetime.now() + timedelta(days=31)
+                }])
+                other.commit()
+            finally:
+                other.close()
+
+        step("create_session", create, 0)
+        step("delete_session", lambda: movies_crud.delete_session(db, created["session"].id), 0)
+        step("other process", other_process_create, 1)
+    finally:
+        db.close()
+
+    ok = all(row["reloads"] == row["expected"] for row in rows)
+    print(f"{'step':>16} {'reloads':>7} {'expected':>8} {'size':>6}")
+    for row in rows:
+        print(f"{row['step']:>16} {row['reloads']:>7} {row['expected']:>8} {row['size']:>6}")
+    print("ok:", ok)
+
+    results_file = save_results({"meta": run_metadata("schedule_cache_check", vars(args)), "rows": rows, "ok": ok},
+                                args.output)
+    print(f"Saved {results_file}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Стресс-тест бронирования: тысячи параллельных броней на один сеанс.
+
+Каждый пользователь в своём потоке и своей сессии БД вызывает booking_crud.create_booking
+для одного и того же сеанса, мест в котором меньше, чем пользователей. После прогона проверяется:
+- мест продано не больше, чем было: seats + броней == исходное число мест;
+- ни одно место не продано дважды (номера мест в бронях уникальны);
+- схема зала согласована с бронями (занятых мест в seat_map столько же, сколько броней);
+- все отказы — "нет мест", а не ошибки.
+Для каждой брони замеряется время; перцентили выводятся для всего прогона и по четвертям
+в порядке завершения — при атомарном условном UPDATE задержка не должна расти к концу.
+
+Запуск из корня репозитория:
+    python -m benchmarks.stress_booking [--bookings 2000] [--seats 1500] [--threads 64]
+Код выхода 1, если найдена перепродажа или несогласованность.
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import prepare_environment, seed_sessions, seed_users, percentile, run_metadata, save_results
+
+
+def book(user_id: int, session_id: int, barrier: threading.Barrier | None) -> tuple[str, float, float]:
+    """Одна бронь в собственной сессии БД; возвращает итог, время брони и момент завершения."""
+    from app.database.cruds import booking_crud
+    from app.database.session import session_local
+
+    if barrier is not None:
+        # Первая волна потоков стартует одновременно
+        barrier.wait()
+    db = session_local()
+    started = time.perf_counter()
+    try:
+        booking_crud.create_booking(db, user_id, session_id)
+        outcome = "booked"
+    except ValueError as e:
+        outcome = str(e)
+    finally:
+        db.close()
+    finished = time.perf_counter()
+    return outcome, finished - started, finished
+
+
+def latency(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+        "max_ms": round(timings[-1] * 1000, 2) if timings else 0.0,
+    }
+
+
+def check(session_id: int, initial_seats: int) -> dict:
+    """Сверяет счётчик мест, брони и схему зала после прогона."""
+    from sqlalchemy import func, select
+    from app.database.models import BookingSession, MovieSession
+    from app.database.seat_map import SEAT_FREE
+    from app.database.session import session_local
+
+    db = session_local()
+    try:
+        seats_left, seat_map = db.execute(
+            select(MovieSession.seats, MovieSession.seat_map).where(MovieSession.id == session_id)
+        ).one()
+        bookings = db.scalar(
+            select(func.count()).select_from(BookingSession).where(BookingSession.movie_id == session_id)
+        )
+        duplicate_seats = db.execute(
+            select(BookingSession.seat)
+            .where(BookingSession.movie_id == session_id)
+            .group_by(BookingSession.seat)
+            .having(func.count() > 1)
+        ).all()
+    finally:
+        db.close()
+    taken_in_map = sum(1 for status in seat_map if status != SEAT_FREE)
+    return {
+        "initial_seats": initial_seats,
+        "seats_left": seats_left,
+        "bookings": bookings,
+        "taken_in_seat_map": taken_in_map,
+        "duplicate_seats": len(duplicate_seats),
+        "ok": seats_left + bookings == initial_seats and seats_left >= 0
+              and not duplicate_seats and taken_in_map == bookings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стресс-тест параллельного бронирования одного сеанса")
+    parser.add_argument("--bookings", type=int, default=2000, help="Параллельных броней (пользователей)")
+    parser.add_argument("--seats", type=int, default=1500, help="Мест в сеансе")
+    parser.add_argument("--threads", type=int, default=64, help="Потоков, бронирующих одновременно")
+    parser.add_argument("--db-dir", help="Каталог для базы (по умолчанию новый временный)")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    args = parser.parse_args()
+
+    prepare_environment(args.db_dir)
+    from app.database import models
+    from app.database.session import session_local, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session_local()
+    try:
+        session_id, = seed_sessions(db, 1, args.seats)
+        users = seed_users(db, args.bookings, prefix="stress")
+    finally:
+        db.close()
+
+    barrier = threading.Barrier(min(args.threads, len(users)))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [
+            pool.submit(book, user_id, session_id, barrier if i < barrier.parties else None)
+            for i, (user_id, _) in enumerate(users)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(outcome for outcome, _, _ in results)
+    # Задержка по четвертям в порядке завершения: рост к концу означал бы деградацию под нагрузкой
+    by_finish = [duration for _, duration, _ in sorted(results, key=lambda result: result[2])]
+    quarter = max(1, len(by_finish) // 4)
+    quarters = [latency(by_finish[i * quarter:(i + 1) * quarter if i < 3 else None]) for i in range(4)]
+    summary = {
+        "elapsed_s": round(elapsed, 2),
+        "bookings_per_s": round(len(results) / elapsed, 1),
+        "outcomes": dict(outcomes),
+        "latency": latency([duration for _, duration, _ in results]),
+        "latency_by_quarter": quarters,
+        "check": check(session_id, args.seats),
+    }
+    unexpected = set(outcomes) - {"booked", "Not enough seats available"}
+    summary["check"]["ok"] = summary["check"]["ok"] and not unexpected
+
+    print(f"{len(results)} bookings on one session with {args.seats} seats in {summary['elapsed_s']} s "
+          f"({summary['bookings_per_s']} bookings/s), {args.threads} threads")
+    print("outcomes:", dict(outcomes))
+    print(f"{'latency':10} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in [("all", summary["latency"])] + [(f"quarter {i + 1}", q) for i, q in enumerate(quarters)]:
+        print(f"{name:10} {stats['count']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8} {stats['max_ms']:>8}")
+    print("check:", summary["check"])
+
+    results_file = save_results({"meta": run_metadata("stress_booking", vars(args)), **summary}, args.output)
+    print(f"Saved {results_file}")
+    sys.exit(0 if summary["check"]["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()